@@ -0,0 +1,216 @@
+from Types import (
+    APIResult, APISuccess, APIFailure, TMError, BearerResult, BearerSuccess, ClientArgs, SessionArgs,
+    ConnectionResult, ConnectionSuccess, ConnectionFailure, DivisionData, FieldsetData, EndpointCacheMember,
+    MatchRound, generic_to_string
+)
+from Bearer import Bearer
+from Client import Client
+from EndpointCache import EndpointCache
+from Signer import Signer
+from SingleFlight import SingleFlight
+from TokenStore import TokenStore
+import Metrics
+
+import asyncio
+import httpx
+import time
+
+from typing import Any, Awaitable, Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Fieldset import Fieldset
+    from Division import Division
+    from Journal import JournalRecorder
+
+
+class AsyncClient:
+    """asyncio counterpart of Client.
+
+    Wraps a Client for its endpoint cache, bearer, signer and journal, so responses are signed, decoded
+    and cached exactly as Client does, but performs REST calls on a pooled httpx.AsyncClient so polling
+    never blocks the event loop. It is not a Client, every getter here is a coroutine.
+    Divisions and Fieldsets returned from here must use their *_async getters."""
+
+    def __init__(self: AsyncClient, args: ClientArgs, token_store: TokenStore | None = None):
+        # The bearer fetch still goes through the wrapped Client's pooled requests session
+        self.core: Client = Client(args, token_store)
+        self.connection_args: ClientArgs = self.core.connection_args
+        self.endpoint_cache: EndpointCache = self.core.endpoint_cache
+        self.bearer: Bearer = self.core.bearer
+        self.signer: Signer = self.core.signer
+        self.single_flight: SingleFlight = self.core.single_flight
+        self.journal: JournalRecorder | None = self.core.journal
+        self.async_session: httpx.AsyncClient = self.create_async_session(self.connection_args.session_args)
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["core", "async_session"])
+
+    async def __aenter__(self: AsyncClient) -> AsyncClient:
+        return self
+
+    async def __aexit__(self: AsyncClient, *exc_info) -> None:
+        await self.aclose()
+        return None
+
+    # Signing and response handling are the wrapped Client's
+
+    def get_authorization_headers(self: AsyncClient, url: str, method: str = "GET") -> dict:
+        return self.core.get_authorization_headers(url, method)
+
+    def prepare_request(self: AsyncClient, path: str) -> tuple[str, dict[str, str], EndpointCacheMember | None]:
+        return self.core.prepare_request(path)
+
+    def handle_response(self: AsyncClient, url: str, response: Any, cached: EndpointCacheMember | None) -> APIResult:
+        return self.core.handle_response(url, response, cached)
+
+    def typed_skills(self: AsyncClient, rs: APIResult) -> APIResult:
+        return self.core.typed_skills(rs)
+
+    def close(self: AsyncClient) -> None:
+        # Everything but the httpx session, see aclose()
+        self.core.close()
+        return None
+
+    @staticmethod
+    def create_async_session(session_args: SessionArgs) -> httpx.AsyncClient:
+        limits: httpx.Limits = httpx.Limits(
+            max_connections=session_args.pool_maxsize,
+            max_keepalive_connections=session_args.pool_maxsize if session_args.keep_alive else 0
+        )
+        timeout: httpx.Timeout = httpx.Timeout(session_args.read_timeout, connect=session_args.connect_timeout)
+        transport: httpx.AsyncHTTPTransport = httpx.AsyncHTTPTransport(
+            limits=limits,
+            retries=session_args.max_retries
+        )
+        return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+    async def aclose(self: AsyncClient) -> None:
+        await self.async_session.aclose()
+        self.close()
+        return None
+
+    async def ensure_bearer(self: AsyncClient) -> BearerResult:
+        # The viable path is a cheap in-memory check, only a refresh needs to leave the loop
+        if self.bearer.is_viable(self.bearer.token):
+            return BearerSuccess(token=self.bearer.token)
+        return await asyncio.to_thread(self.bearer.ensure)
+
+    async def get_divisions(self: AsyncClient) -> APIResult:
+        from Division import Division
+        if not (rs:=await self.get("/api/divisions")).success:
+            return rs
+        data: list[DivisionData] = [DivisionData(id=div["id"], name=div["name"]) for div in rs.data["divisions"]]
+        data: list[Division] = [Division(self, div_dat) for div_dat in data]
+        return APISuccess[list[Division]](data=data, cached=rs.cached)
+
+    async def get_fieldsets(self: AsyncClient) -> APIResult:
+        from Fieldset import Fieldset
+        if not (rs:=await self.get("/api/fieldsets")).success:
+            return rs
+        data: list[FieldsetData] = [FieldsetData(id=div["id"], name=div["name"]) for div in rs.data["fieldSets"]]
+        data: list[Fieldset] = [Fieldset(self, fs_data) for fs_data in data]
+        return APISuccess[list[Fieldset]](data=data, cached=rs.cached)
+
+    async def get_teams(self: AsyncClient) -> APIResult:
+        return await self.get("/api/teams")
+
+    async def get_skills(self: AsyncClient) -> APIResult:
+        return self.typed_skills(await self.get("/api/skills"))
+
+    async def get_event_info(self: AsyncClient) -> APIResult:
+        return await self.get("/api/event")
+
+    async def snapshot(
+            self: AsyncClient,
+            rounds: Iterable[MatchRound | str] = (MatchRound.Qualification,),
+            max_in_flight: int = 8
+    ) -> APIResult:
+        if not (rs:=await self.ensure_bearer()).success:
+            return APIFailure(error=rs.error, error_details=rs.error_details)
+
+        limit: asyncio.Semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def bounded(aw: Awaitable[APIResult]) -> APIResult:
+            async with limit:
+                return await aw
+
+        event_rs, skills_rs, div_rs, fs_rs = await asyncio.gather(
+            bounded(self.get_event_info()),
+            bounded(self.get_skills()),
+            bounded(self.get_divisions()),
+            bounded(self.get_fieldsets())
+        )
+
+        divisions: list[Division] = div_rs.data if div_rs.success else []
+        fieldsets: list[Fieldset] = fs_rs.data if fs_rs.success else []
+        rounds: list[str] = [str(r) for r in rounds]
+
+        async def division_part(div: Division) -> tuple[APIResult, APIResult, dict[str, APIResult]]:
+            teams_rs, matches_rs, *rankings_rs = await asyncio.gather(
+                bounded(div.get_teams_async()),
+                bounded(div.get_matches_async()),
+                *[bounded(div.get_rankings_async(r)) for r in rounds]
+            )
+            return teams_rs, matches_rs, dict(zip(rounds, rankings_rs))
+
+        division_parts, fieldset_parts = await asyncio.gather(
+            asyncio.gather(*[division_part(div) for div in divisions]),
+            asyncio.gather(*[bounded(fs.get_fields_async()) for fs in fieldsets])
+        )
+
+        return Client.assemble_snapshot(
+            event_rs=event_rs,
+            skills_rs=skills_rs,
+            div_rs=div_rs,
+            fs_rs=fs_rs,
+            division_parts=dict(zip(divisions, division_parts)),
+            fieldset_parts=dict(zip(fieldsets, fieldset_parts))
+        )
+
+    async def connect(self: AsyncClient) -> ConnectionResult:
+        if not (rs:=await self.ensure_bearer()).success:
+            return ConnectionFailure(
+                origin="bearer",
+                error=rs.error,
+                error_details=rs.error_details
+            )
+        if self.connection_args.bearer_refresh:
+            self.bearer.start_refresher()
+
+        if not (div_rs := await self.get_divisions()).success:
+            return ConnectionFailure(
+                origin="connection",
+                error=div_rs.error,
+                error_details=div_rs.error_details
+            )
+
+        if not (fs_rs:=await self.get_fieldsets()).success:
+            return ConnectionFailure(
+                origin="connection",
+                error=fs_rs.error,
+                error_details=fs_rs.error_details
+            )
+
+        return ConnectionSuccess()
+
+    async def get(self: AsyncClient, path: str) -> APIResult:
+        return await self.single_flight.do_async(path, lambda: self.fetch(path))
+
+    async def fetch(self: AsyncClient, path: str) -> APIResult:
+        started: float | None = time.perf_counter() if Metrics.registry.enabled else None
+        if not (rs:=await self.ensure_bearer()).success:
+            return Client.observe_request(path, started, "error", APIFailure(error=rs.error))
+
+        status: int | str = "error"
+        try:
+            url, headers, cached = self.prepare_request(path)
+            response: httpx.Response = await self.async_session.get(url, headers=headers)
+            status = response.status_code
+            rs = self.handle_response(url, response, cached)
+
+        except Exception as e:
+            rs = APIFailure(
+                error=TMError.WebServerConnectionError,
+                error_details=e
+            )
+        return Client.observe_request(path, started, status, rs)
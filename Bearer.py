@@ -1,21 +1,39 @@
 import datetime
-import os
-import pickle
+import threading
+import time
 
 import requests
 
+import Metrics
+from TokenStore import TokenStore, FileTokenStore
 from Types import BearerResult, ClientArgs, BearerFailure, TMError, BearerToken, BearerSuccess, generic_to_string
 
 
 class Bearer:
-    def __init__(self: Bearer, conn_str: str, conn_args: ClientArgs):
+    def __init__(
+            self: Bearer,
+            conn_str: str,
+            conn_args: ClientArgs,
+            session: requests.Session | None = None,
+            store: TokenStore | None = None
+    ):
         self.conn_str: str = conn_str
         self.conn_args: ClientArgs = conn_args
+        # Shared with the owning Client so the token fetch reuses pooled connections
+        self.session: requests.Session = session if session is not None else requests.Session()
+        self.store: TokenStore = store if store is not None else FileTokenStore()
         self.token: BearerToken | None = None
+        # True when the current token was loaded from the store rather than fetched by us
         self.from_pickle: bool = False
+        # Serializes refreshes so concurrent ensure() callers share one fetch
+        self.lock: threading.Lock = threading.Lock()
+        self.refresher: threading.Thread | None = None
+        self.refresher_stop: threading.Event = threading.Event()
 
     def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
+        return generic_to_string(
+            *args, **kwargs, ignored_fields=["session", "lock", "refresher", "refresher_stop"]
+        )
 
     def fetch_new(self: Bearer) -> BearerResult:
         if hasattr((auth := self.conn_args.authorization_args.authorization), "getBearer"):
@@ -32,52 +50,55 @@ class Bearer:
                 "client_secret": auth.client_secret,
                 "grant_type": auth.grant_type
             }
-            return requests.post(url=self.conn_str, headers=headers, params=params)
+            return self.session.post(
+                url=self.conn_str,
+                headers=headers,
+                params=params,
+                timeout=self.conn_args.session_args.timeout
+            )
 
+        # expires_in counts from when the server issued the token, take the time before asking
+        issued_at: datetime.datetime = datetime.datetime.now(datetime.UTC)
         if not (response := request_token()).ok:
             if response.json()["error"] == "invalid_client":
                 return BearerFailure(error=TMError.CredentialsInvalid)
             else:
                 return BearerFailure(error=TMError.CredentialsError)
         else:
+            body: dict = response.json()
             bearer: BearerToken = BearerToken(
-                access_token=response.json()["access_token"],
-                token_type=response.json()["token_type"],
+                access_token=body["access_token"],
+                token_type=body["token_type"],
                 # Assuming number of seconds
-                expires_in=datetime.timedelta(seconds=float(response.json()["expires_in"]))
+                expires_in=datetime.timedelta(seconds=float(body["expires_in"])),
+                issued_at=issued_at
             )
 
-            self.pickle_bearer(bearer)
             return BearerSuccess(token=bearer)
 
-    @staticmethod
-    def pickle_bearer(token: BearerToken) -> None:
-        assert isinstance(token, BearerToken)
-        with open("latest_bearer.pickle", 'wb') as fout:
-            pickle.dump(token, fout, pickle.HIGHEST_PROTOCOL)
-        return None
-
-    @staticmethod
-    def unpickle_bearer() -> BearerToken | None:
-        if os.path.exists("latest_bearer.pickle"):
-            with open("latest_bearer.pickle", 'rb') as fin:
-                if isinstance((obj := pickle.load(fin)), BearerToken):
-                    return obj
-                else:
-                    Bearer.remove_pickle()
-        return None
-
-    @staticmethod
-    def remove_pickle() -> None:
-        if os.path.exists("latest_bearer.pickle"):
-            os.remove("latest_bearer.pickle")
-        return None
-
     def update_bearer(self: Bearer) -> BearerResult:
+        if not Metrics.registry.enabled:
+            return self.load_or_fetch()
+        started: float = time.perf_counter()
+        rs: BearerResult = self.load_or_fetch()
+        outcome: str = "failed" if not rs.success else "stored" if self.from_pickle else "fetched"
+        Metrics.observe_bearer_refresh(outcome, time.perf_counter() - started)
+        return rs
+
+    def load_or_fetch(self: Bearer) -> BearerResult:
         try:
-            bearer_result: BearerResult = self.fetch_new()
-            if not bearer_result.success:
-                return bearer_result
+            with self.store.lock():
+                # Another process sharing the store may have refreshed while we waited for the lock
+                if (stored := self.store.load()) is not None \
+                        and self.is_viable(stored) and self.refresh_due_in(stored) > 0:
+                    self.token = stored
+                    self.from_pickle = True
+                    return BearerSuccess(token=stored)
+
+                bearer_result: BearerResult = self.fetch_new()
+                if not bearer_result.success:
+                    return bearer_result
+                self.store.save(bearer_result.token)
             self.token = bearer_result.token
             self.from_pickle = False
             return BearerSuccess(token=bearer_result.token)
@@ -87,28 +108,69 @@ class Bearer:
     def is_viable(self: Bearer, bearer: BearerToken | None = None) -> bool:
         if bearer is None:
             bearer: BearerToken = self.token
-        if bearer is None:
+        # Pickles written before issued_at was recorded cannot be trusted
+        if bearer is None or getattr(bearer, "issued_at", None) is None:
             return False
         now: datetime.datetime = datetime.datetime.now(datetime.UTC)
-        expiry: datetime.datetime = now + bearer.expires_in
-        expired: bool = expiry <= now
-        expires_soon: bool = bearer.expires_in < self.conn_args.bearer_margin
-        return not (expired or expires_soon)
+        return now < bearer.expires_at - self.conn_args.bearer_margin
 
     def ensure(self: Bearer) -> BearerResult:
         # If our in-memory bearer token is fine, return that
-        if self.is_viable(self.token):
-            return BearerSuccess(token=self.token)
-
-        # If there is a local token, return that if it is valid,
-        # delete it if it is not valid
-        if (token := self.unpickle_bearer()) is not None:
-            if not self.is_viable(token):
-                self.remove_pickle()
-            else:
-                self.token = token
-                self.from_pickle = True
+        if self.is_viable(token := self.token):
+            return BearerSuccess(token=token)
+
+        with self.lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.is_viable(token := self.token):
                 return BearerSuccess(token=token)
 
-        # If we haven't found a viable token yet, get a new one
-        return self.update_bearer()
\ No newline at end of file
+            # If we haven't found a viable token yet, get a new one,
+            # update_bearer picks up a viable stored token first
+            return self.update_bearer()
+
+    def refresh_due_in(self: Bearer, bearer: BearerToken | None = None) -> float:
+        # Seconds until the token should be renewed, 0 when it already should be
+        if bearer is None:
+            bearer: BearerToken = self.token
+        if bearer is None or getattr(bearer, "issued_at", None) is None:
+            return 0.0
+        # Never renew earlier than half way through the token's life
+        lead: datetime.timedelta = min(self.conn_args.bearer_refresh_lead, bearer.expires_in / 2)
+        due: datetime.datetime = bearer.expires_at - self.conn_args.bearer_margin - lead
+        return max(0.0, (due - datetime.datetime.now(datetime.UTC)).total_seconds())
+
+    def refresh_loop(self: Bearer) -> None:
+        retry: float = 1.0
+        # The first pass also picks up a stored token, off the request path
+        rs: BearerResult = self.ensure()
+        while not self.refresher_stop.is_set():
+            if rs.success:
+                retry = 1.0
+                self.refresher_stop.wait(max(1.0, self.refresh_due_in()))
+            else:
+                # Keep serving the current token while it lasts, retry with backoff
+                self.refresher_stop.wait(retry)
+                retry = min(retry * 2, 60.0)
+            if self.refresher_stop.is_set():
+                break
+            with self.lock:
+                # ensure() may have refreshed already
+                rs = self.update_bearer() if self.refresh_due_in() <= 0 else BearerSuccess(token=self.token)
+        return None
+
+    def start_refresher(self: Bearer) -> None:
+        """Renew the token in a background thread bearer_refresh_lead before it stops being viable,
+        so requests never wait on the OAuth round trip."""
+        if self.refresher is not None and self.refresher.is_alive():
+            return None
+        self.refresher_stop.clear()
+        self.refresher = threading.Thread(target=self.refresh_loop, name="bearer-refresher", daemon=True)
+        self.refresher.start()
+        return None
+
+    def stop_refresher(self: Bearer) -> None:
+        self.refresher_stop.set()
+        if self.refresher is not None:
+            self.refresher.join()
+            self.refresher = None
+        return None
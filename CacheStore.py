@@ -0,0 +1,119 @@
+import datetime
+import json
+import logging
+import queue
+import sqlite3
+import threading
+
+from Types import EndpointCacheMember, generic_to_string
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class SQLiteCacheStore:
+    """Single-file persistent backend for EndpointCache.
+
+    Reads happen once, when the cache is first accessed. Writes are queued and
+    applied by a background thread so Client.get never waits on disk."""
+
+    def __init__(self: SQLiteCacheStore, path: str):
+        self.path: str = path
+        # (url, member) to upsert, (url, None) to delete, None to stop the writer
+        self.writes: queue.Queue[tuple[str, EndpointCacheMember | None] | None] = queue.Queue()
+        self.writer: threading.Thread | None = None
+        self.writer_lock: threading.Lock = threading.Lock()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["writes", "writer", "writer_lock"])
+
+    def connect(self: SQLiteCacheStore) -> sqlite3.Connection:
+        connection: sqlite3.Connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS endpoint_cache ("
+            "url TEXT PRIMARY KEY, data TEXT NOT NULL, last_modified TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        return connection
+
+    def load(self: SQLiteCacheStore) -> dict[str, EndpointCacheMember]:
+        connection: sqlite3.Connection = self.connect()
+        try:
+            rows = connection.execute("SELECT url, data, last_modified, size FROM endpoint_cache").fetchall()
+        finally:
+            connection.close()
+        return {
+            url: EndpointCacheMember(
+                data=json.loads(data),
+                last_modified=datetime.datetime.fromisoformat(last_modified),
+                size=size
+            )
+            for url, data, last_modified, size in rows
+        }
+
+    def put(self: SQLiteCacheStore, url: str, member: EndpointCacheMember) -> None:
+        self.start()
+        self.writes.put((url, member))
+        return None
+
+    def delete(self: SQLiteCacheStore, url: str) -> None:
+        self.start()
+        self.writes.put((url, None))
+        return None
+
+    def start(self: SQLiteCacheStore) -> None:
+        with self.writer_lock:
+            if self.writer is None or not self.writer.is_alive():
+                self.writer = threading.Thread(target=self.write_loop, name="endpoint-cache-writer", daemon=True)
+                self.writer.start()
+        return None
+
+    def write_loop(self: SQLiteCacheStore) -> None:
+        connection: sqlite3.Connection = self.connect()
+        running: bool = True
+        try:
+            while running:
+                # Apply whatever else is already queued in the same transaction
+                batch: list[tuple[str, EndpointCacheMember | None] | None] = [self.writes.get()]
+                while True:
+                    try:
+                        batch.append(self.writes.get_nowait())
+                    except queue.Empty:
+                        break
+                running = None not in batch
+                try:
+                    self.write_batch(connection, [item for item in batch if item is not None])
+                except Exception:
+                    # The batch is rolled back and lost, the writer keeps serving later writes
+                    logger.exception("endpoint cache: failed to persist %d writes", len(batch))
+                finally:
+                    for _ in batch:
+                        self.writes.task_done()
+        finally:
+            connection.close()
+        return None
+
+    @staticmethod
+    def write_batch(connection: sqlite3.Connection, batch: list[tuple[str, EndpointCacheMember | None]]) -> None:
+        with connection:
+            for url, member in batch:
+                if member is None:
+                    connection.execute("DELETE FROM endpoint_cache WHERE url = ?", (url,))
+                else:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO endpoint_cache (url, data, last_modified, size) VALUES (?, ?, ?, ?)",
+                        (url, json.dumps(member.data), member.last_modified.isoformat(), member.size)
+                    )
+        return None
+
+    def flush(self: SQLiteCacheStore) -> None:
+        # Blocks until every queued write is on disk
+        if self.writer is not None and self.writer.is_alive():
+            self.writes.join()
+        return None
+
+    def close(self: SQLiteCacheStore) -> None:
+        if self.writer is not None and self.writer.is_alive():
+            self.writes.put(None)
+            self.writer.join()
+        self.writer = None
+        return None
@@ -1,30 +1,91 @@
 from requests import Response
 
-from Types import *
+from Types import (
+    APIResult, APISuccess, APIFailure, TMError, ClientArgs, SessionArgs, ValidationMode, ConnectionResult,
+    ConnectionSuccess, ConnectionFailure, DivisionData, FieldsetData, EndpointCacheMember, MatchRound,
+    generic_to_string
+)
 from Bearer import Bearer
+from Decoder import decode_json, decode_error_body
+from EndpointCache import EndpointCache
+import Metrics
+from Records import as_typed
 from RFC1123_Date import RFC1123Date
-from Fieldset import Fieldset
-from Division import Division
+from Signer import Signer
+from SingleFlight import SingleFlight
+from TokenStore import TokenStore
 
-from urllib.parse import urlparse, urljoin, ParseResult
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, TYPE_CHECKING
+from urllib.parse import urljoin
 
-import hmac
 import requests
 import datetime
+import time
+
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    from Fieldset import Fieldset
+    from Division import Division
+    from Journal import JournalRecorder
 
 
 class Client:
     connection_string: str = "https://auth.vextm.dwabtech.com/oauth2/token"
 
-    def __init__(self: Client, args: ClientArgs):
+    def __init__(self: Client, args: ClientArgs, token_store: TokenStore | None = None):
         self.connection_args: ClientArgs = args
-        self.endpoint_cache: dict[str, EndpointCacheMember] = dict()
-        self.bearer: Bearer = Bearer(self.connection_string, self.connection_args)
+        self.endpoint_cache: EndpointCache = EndpointCache(self.connection_args.cache_args)
+        # One pooled keep-alive session for every REST call, including the bearer fetch
+        self.session: requests.Session = self.create_session(self.connection_args.session_args)
+        # Pass a shared TokenStore so several Clients or processes use one token
+        auth_address: str = args.auth_address if args.auth_address is not None else self.connection_string
+        self.bearer: Bearer = Bearer(auth_address, self.connection_args, self.session, token_store)
+        self.signer: Signer = Signer(self.connection_args.clientAPIKey)
+        self.single_flight: SingleFlight = SingleFlight()
+        self.journal: JournalRecorder | None = None
+        if args.journal_path is not None:
+            from Journal import JournalRecorder
+            self.journal = JournalRecorder(args.journal_path)
 
     def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
+        return generic_to_string(*args, **kwargs, ignored_fields=["session"])
+
+    def __enter__(self: Client) -> Client:
+        return self
+
+    def __exit__(self: Client, *exc_info) -> None:
+        self.close()
+        return None
+
+    @staticmethod
+    def create_session(session_args: SessionArgs) -> requests.Session:
+        session: requests.Session = requests.Session()
+        adapter: HTTPAdapter = HTTPAdapter(
+            pool_connections=session_args.pool_connections,
+            pool_maxsize=session_args.pool_maxsize,
+            max_retries=session_args.max_retries
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not session_args.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self: Client) -> None:
+        # Stops the bearer refresher, releases every pooled connection and flushes
+        # a persistent endpoint cache; the Client should not be used afterward
+        self.bearer.stop_refresher()
+        self.session.close()
+        self.endpoint_cache.close()
+        if self.journal is not None:
+            self.journal.close()
+        return None
 
     def get_divisions(self: Client) -> APIResult:
+        # Imported here, a Client that never lists divisions or fieldsets does not pay for loading them
+        from Division import Division
         if not (rs:=self.get("/api/divisions")).success:
             return rs
         data: list[DivisionData] = [DivisionData(id=div["id"], name=div["name"]) for div in rs.data["divisions"]]
@@ -32,6 +93,7 @@ class Client:
         return APISuccess[list[Division]](data=data,  cached=rs.cached)
 
     def get_fieldsets(self: Client) -> APIResult:
+        from Fieldset import Fieldset
         if not (rs:=self.get("/api/fieldsets")).success:
             return rs
         data: list[FieldsetData] = [FieldsetData(id=div["id"], name=div["name"]) for div in rs.data["fieldSets"]]
@@ -42,36 +104,107 @@ class Client:
         return self.get("/api/teams")
 
     def get_skills(self: Client) -> APIResult:
-        return self.get("/api/skills")
+        return self.typed_skills(self.get("/api/skills"))
+
+    def typed_skills(self: Client, rs: APIResult) -> APIResult:
+        # Raw validation keeps the whole response body, as before typed results existed
+        if not rs.success or self.connection_args.validation == ValidationMode.Raw:
+            return rs
+        from Types import SkillsRanking
+        rs.data = rs.data["skillsRankings"]
+        return as_typed(rs, SkillsRanking, self.connection_args.validation)
 
     def get_event_info(self: Client) -> APIResult:
         return self.get("/api/event")
 
+    def snapshot(
+            self: Client,
+            rounds: Iterable[MatchRound | str] = (MatchRound.Qualification,),
+            max_in_flight: int = 8
+    ) -> APIResult:
+        # Make sure a single bearer is in place before fanning out, so workers never race to refresh it
+        if not (rs:=self.bearer.ensure()).success:
+            return APIFailure(error=rs.error, error_details=rs.error_details)
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            event_f: Future = pool.submit(self.get_event_info)
+            skills_f: Future = pool.submit(self.get_skills)
+            div_f: Future = pool.submit(self.get_divisions)
+            fs_f: Future = pool.submit(self.get_fieldsets)
+
+            division_parts: dict[Division, tuple[Future, Future, dict[str, Future]]] = dict()
+            if (div_rs := div_f.result()).success:
+                for div in div_rs.data:
+                    division_parts[div] = (
+                        pool.submit(div.get_teams),
+                        pool.submit(div.get_matches),
+                        {str(r): pool.submit(div.get_rankings, r) for r in rounds}
+                    )
+
+            fieldset_parts: dict[Fieldset, Future] = dict()
+            if (fs_rs := fs_f.result()).success:
+                fieldset_parts = {fs: pool.submit(fs.get_fields) for fs in fs_rs.data}
+
+            return self.assemble_snapshot(
+                event_rs=event_f.result(),
+                skills_rs=skills_f.result(),
+                div_rs=div_rs,
+                fs_rs=fs_rs,
+                division_parts={
+                    div: (teams.result(), matches.result(), {r: f.result() for r, f in rankings.items()})
+                    for div, (teams, matches, rankings) in division_parts.items()
+                },
+                fieldset_parts={fs: f.result() for fs, f in fieldset_parts.items()}
+            )
+
+    @staticmethod
+    def assemble_snapshot(
+            event_rs: APIResult,
+            skills_rs: APIResult,
+            div_rs: APIResult,
+            fs_rs: APIResult,
+            division_parts: dict[Division, tuple[APIResult, APIResult, dict[str, APIResult]]],
+            fieldset_parts: dict[Fieldset, APIResult]
+    ) -> APIResult:
+        from Types import EventSnapshot, DivisionSnapshot, FieldsetSnapshot
+        results: list[APIResult] = [event_rs, skills_rs, div_rs, fs_rs]
+        for teams_rs, matches_rs, rankings_rs in division_parts.values():
+            results += [teams_rs, matches_rs, *rankings_rs.values()]
+        results += fieldset_parts.values()
+
+        # A snapshot is all or nothing, report the first part that failed
+        for rs in results:
+            if not rs.success:
+                return rs
+
+        data: EventSnapshot = EventSnapshot(
+            event_info=event_rs.data,
+            skills=skills_rs.data,
+            divisions=[
+                DivisionSnapshot(
+                    id=div.id,
+                    name=div.name,
+                    teams=teams_rs.data,
+                    matches=matches_rs.data,
+                    rankings={r: rs.data for r, rs in rankings_rs.items()}
+                )
+                for div, (teams_rs, matches_rs, rankings_rs) in division_parts.items()
+            ],
+            fieldsets=[
+                FieldsetSnapshot(id=fs.id, name=fs.name, fields=fields_rs.data)
+                for fs, fields_rs in fieldset_parts.items()
+            ],
+            requests=len(results),
+            cache_hits=sum(1 for rs in results if rs.cached),
+            taken_at=datetime.datetime.now(datetime.UTC)
+        )
+        return APISuccess[EventSnapshot](
+            data=data,
+            cached=data.cache_hits == data.requests
+        )
+
     def get_authorization_headers(self: Client, url: str, method: str = "GET") -> dict:
-        # TM dates look like "Wed, 04 Feb 2026 06:48:25 GMT"
-        tm_date: str = str(RFC1123Date(datetime.datetime.now(datetime.timezone.utc)))
-
-        parsed_url: ParseResult = urlparse(url)
-
-        string_to_sign: str = "\n".join([
-            method,
-            parsed_url.path + parsed_url.query,
-            f"token:{self.bearer.token.access_token}",
-            f"host:{parsed_url.netloc}",
-            f"x-tm-date:{tm_date}"
-        ])
-        string_to_sign += "\n"
-
-        signature: hmac.HMAC = hmac.new(key=self.connection_args.clientAPIKey.encode("UTF-8"), digestmod="sha256")
-        signature.update(string_to_sign.encode("UTF-8"))
-        signature: str = signature.hexdigest()
-
-        return {
-            "Authorization": f"Bearer {self.bearer.token.access_token}",
-            "x-tm-date": f"{tm_date}",
-            "x-tm-signature": f"{signature}",
-            "Host": f"{parsed_url.netloc}"
-        }
+        return self.signer.sign(url, self.bearer.token.access_token, method)
 
     def connect(self: Client) -> ConnectionResult:
         if not (rs:=self.bearer.ensure()).success:
@@ -80,6 +213,8 @@ class Client:
                 error=rs.error,
                 error_details=rs.error_details
             )
+        if self.connection_args.bearer_refresh:
+            self.bearer.start_refresher()
 
         if not (div_rs := self.get_divisions()).success:
             return ConnectionFailure(
@@ -97,56 +232,93 @@ class Client:
 
         return ConnectionSuccess()
 
-    def get(self: Client, path: str) -> APIResult:
-        if not (rs:=self.bearer.ensure()).success:
-            return APIFailure(error=rs.error)
-
+    def prepare_request(self: Client, path: str) -> tuple[str, dict[str, str], EndpointCacheMember | None]:
         url: str = urljoin(self.connection_args.address, path)
         headers: dict[str, str] = { "Content-Type": "application/json" }
+        headers |= self.get_authorization_headers(url, "GET",)
+        # Keep hold of the member itself, it may be evicted before a 304 comes back
+        if (cached := self.endpoint_cache.lookup(url)) is not None:
+            headers |= { "If-Modified-Since": str(RFC1123Date(cached.last_modified)) }
+        return url, headers, cached
+
+    def handle_response(self: Client, url: str, response: Any, cached: EndpointCacheMember | None) -> APIResult:
+        # response is a requests.Response or an httpx.Response, both expose the members used here
+        if self.journal is not None:
+            self.journal.record_response(url, response)
+        match response.status_code:
+            case 503:
+                return APIFailure(
+                    error=TMError.WebServerNotEnabled,
+                    error_details=decode_error_body(response.content)
+                )
+            case 401:
+                return APIFailure(
+                    error=TMError.WebServerInvalidSignature,
+                    error_details=decode_error_body(response.content)
+                )
+            case 304 if cached is not None:
+                self.endpoint_cache.record_not_modified(url)
+                return APISuccess[Any](
+                    data=cached.data,
+                    cached=True
+                )
+            case 304:
+                # Nothing cached to answer with: the request was not conditional, or a journal replays a 304 alone
+                return APIFailure(
+                    error=TMError.WebServerError,
+                    error_details=f"304 Not Modified for {url} without a cached response"
+                )
+            case 200:
+                # Decode once, the cache and the caller share the same object graph
+                body: bytes = response.content
+                data: Any = decode_json(body)
+                # Update the endpoint cache
+                if "Last-Modified" in response.headers:
+                    self.endpoint_cache.store(url, EndpointCacheMember(
+                        data=data,
+                        last_modified=RFC1123Date(response.headers.get("Last-Modified")).datetime_obj,
+                        size=len(body)
+                    ))
+                return APISuccess[Any](
+                    data=data,
+                    cached=False
+                )
+            case _:
+                return APIFailure(
+                    error=TMError.WebSocketError,
+                    error_details=decode_error_body(response.content)
+                )
+
+    def get(self: Client, path: str) -> APIResult:
+        # Concurrent callers for the same path share one upstream request
+        return self.single_flight.do(path, lambda: self.fetch(path))
+
+    def fetch(self: Client, path: str) -> APIResult:
+        started: float | None = time.perf_counter() if Metrics.registry.enabled else None
+        if not (rs:=self.bearer.ensure()).success:
+            return self.observe_request(path, started, "error", APIFailure(error=rs.error))
 
+        status: int | str = "error"
         try:
-            headers |= self.get_authorization_headers(url, "GET",)
-            if str(url) in self.endpoint_cache.keys():
-                last_modified: datetime.datetime = self.endpoint_cache[str(url)].last_modified
-                headers |= { "If-Modified-Since": str(RFC1123Date(last_modified)) }
-
-            response: Response = requests.get(url, headers=headers)
-
-            match response.status_code:
-                case 503:
-                    return APIFailure(
-                        error=TMError.WebServerNotEnabled,
-                        error_details=response.json()
-                    )
-                case 401:
-                    return APIFailure(
-                        error=TMError.WebServerInvalidSignature,
-                        error_details=response.json()
-                    )
-                case 304:
-                    return APISuccess[Any](
-                        data=self.endpoint_cache[str(url)].data,
-                        cached=True
-                    )
-                case 200:
-                    # Update the endpoint cache
-                    if "Last-Modified" in response.headers.keys():
-                        self.endpoint_cache[str(url)] = EndpointCacheMember(
-                            data=response.json(),
-                            last_modified=RFC1123Date(response.headers.get("Last-Modified")).datetime_obj
-                        )
-                    return APISuccess[Any](
-                        data=response.json(),
-                        cached=False
-                    )
-                case _:
-                    return APIFailure(
-                        error=TMError.WebSocketError,
-                        error_details=response.json()
-                    )
+            url, headers, cached = self.prepare_request(path)
+            response: Response = self.session.get(
+                url,
+                headers=headers,
+                timeout=self.connection_args.session_args.timeout
+            )
+            status = response.status_code
+            rs = self.handle_response(url, response, cached)
 
         except Exception as e:
-            return APIFailure(
+            rs = APIFailure(
                 error=TMError.WebServerConnectionError,
                 error_details=e
-            )
\ No newline at end of file
+            )
+        return self.observe_request(path, started, status, rs)
+
+    @staticmethod
+    def observe_request(path: str, started: float | None, status: int | str, rs: APIResult) -> APIResult:
+        # started is None when metrics are disabled
+        if started is not None:
+            Metrics.observe_request(path, status, rs.success and rs.cached, time.perf_counter() - started)
+        return rs
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+import Metrics
+from Types import (
+    APIResult, APISuccess, APIFailure, TMError, CommandStats, FieldsetCommand, FieldsetEvent, FieldsetMatch,
+    StartMatch, EndMatchEarly, AbortMatch, QueuePreviousMatch, QueueNextMatch, QueueSkills, SetAudienceDisplay,
+    ActiveMatchType, MatchRound, MatchTuple, numeric, generic_to_string
+)
+
+DEFAULT_COMMAND_QUEUE_SIZE: int = 16
+# Seconds from taking a command off the queue to its confirming event
+DEFAULT_COMMAND_TIMEOUT: float = 5.0
+# Tournament Manager's own number for the skills round, match tuples may carry it instead of the name
+SKILLS_ROUND_CODE: int = 18
+
+
+def is_skills(match: MatchTuple) -> bool:
+    return match.round == MatchRound.Skills or match.round == SKILLS_ROUND_CODE
+
+
+def queued_match(
+        queued: FieldsetMatch | None,
+        skills: bool
+) -> Callable[[FieldsetEvent], bool]:
+    # The queue commands name no match, so the assignment answering one must be a match of the right kind
+    # other than the one queued when the command went out. Another operator's assignment of the same kind
+    # can still not be told apart
+    previous: MatchTuple | None = queued.match if queued is not None and queued.type == ActiveMatchType.Match \
+        else None
+    return lambda event: event.type == "fieldMatchAssigned" and event.match is not None \
+        and event.match != previous and is_skills(event.match) == skills
+
+
+def confirmation(
+        command: FieldsetCommand,
+        queued: FieldsetMatch | None = None
+) -> Callable[[FieldsetEvent], bool] | None:
+    # The event Tournament Manager answers a command with, None when it answers with nothing.
+    # queued is the fieldset's match assignment when the command is sent
+    match command:
+        case StartMatch():
+            return lambda event: event.type == "matchStarted" and event.field_id == command.field_id
+        case EndMatchEarly() | AbortMatch():
+            return lambda event: event.type == "matchStopped" and event.field_id == command.field_id
+        case QueuePreviousMatch() | QueueNextMatch():
+            return queued_match(queued, skills=False)
+        case QueueSkills():
+            return queued_match(queued, skills=True)
+        case SetAudienceDisplay():
+            return lambda event: event.type == "audienceDisplayChanged" and event.display == command.display
+    return None
+
+
+class PendingCommand:
+
+    def __init__(self: PendingCommand, command: FieldsetCommand, timeout: float, loop: asyncio.AbstractEventLoop):
+        self.command: FieldsetCommand = command
+        # Set by CommandQueue.run() when the command is taken off the queue, see confirmation()
+        self.matches: Callable[[FieldsetEvent], bool] | None = None
+        self.timeout: float = timeout
+        # Set by observe() with the confirming event
+        self.confirmed: asyncio.Future[FieldsetEvent] = loop.create_future()
+        # What the caller of submit() gets back
+        self.result: asyncio.Future[APIResult] = loop.create_future()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["matches", "confirmed", "result"])
+
+    def resolve(self: PendingCommand, rs: APIResult) -> None:
+        # The caller may have been cancelled and stopped waiting
+        if not self.result.done():
+            self.result.set_result(rs)
+        return None
+
+
+class CommandQueue:
+    """Sends the commands of one fieldset in submission order, one at a time.
+
+    A command is done once the event confirming it arrives, see confirmation(), or its timeout runs out,
+    and only then does the next one go out. A full queue holds back submit() until there is room."""
+
+    def __init__(
+            self: CommandQueue,
+            fieldset_id: numeric,
+            transmit: Callable[[str], Awaitable[None]],
+            maxsize: int = DEFAULT_COMMAND_QUEUE_SIZE,
+            timeout: float = DEFAULT_COMMAND_TIMEOUT,
+            queued: Callable[[], FieldsetMatch] | None = None
+    ):
+        self.fieldset_id: numeric = fieldset_id
+        self.transmit: Callable[[str], Awaitable[None]] = transmit
+        # The fieldset's current match assignment, queue commands are confirmed by a different one
+        self.queued: Callable[[], FieldsetMatch] | None = queued
+        self.maxsize: int = maxsize
+        self.timeout: float = timeout
+        self.queue: asyncio.Queue[PendingCommand] | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.worker: asyncio.Task | None = None
+        # The command sent and waiting for its confirmation
+        self.inflight: PendingCommand | None = None
+        self.counters: CommandStats = CommandStats(maxsize=maxsize)
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["transmit", "queued", "queue", "loop", "worker", "inflight"])
+
+    @property
+    def stats(self: CommandQueue) -> CommandStats:
+        depth: int = self.queue.qsize() if self.queue is not None else 0
+        return self.counters.model_copy(update={"queue_depth": depth})
+
+    def on_loop(self: CommandQueue) -> asyncio.AbstractEventLoop:
+        running: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done() or self.loop is not running:
+            if self.loop is not None and self.loop is not running:
+                self.abandon()
+            self.loop = running
+            self.queue = asyncio.Queue(self.maxsize)
+            self.worker = running.create_task(self.run(self.queue))
+        return running
+
+    def abandon(self: CommandQueue) -> None:
+        # The previous loop's worker stops, what it had queued or in flight fails with WebSocketClosed
+        loop: asyncio.AbstractEventLoop = self.loop
+        worker: asyncio.Task | None = self.worker
+        queue: asyncio.Queue[PendingCommand] | None = self.queue
+        inflight: PendingCommand | None = self.inflight
+        self.inflight = None
+        closed: APIFailure = APIFailure(error=TMError.WebSocketClosed)
+
+        def fail() -> None:
+            if worker is not None:
+                worker.cancel()
+            if inflight is not None:
+                inflight.resolve(closed)
+            while queue is not None and not queue.empty():
+                queue.get_nowait().resolve(closed)
+
+        # Its futures belong to that loop, a closed loop took every caller awaiting them with it
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(fail)
+        return None
+
+    async def submit(self: CommandQueue, command: FieldsetCommand, timeout: float | None = None) -> APIResult:
+        """APISuccess with the confirming event as data, None for commands that are not confirmed.
+
+        Fails with WebSocketClosed when the command could not be sent and CommandTimeout when
+        it was sent but not confirmed within timeout seconds."""
+        loop: asyncio.AbstractEventLoop = self.on_loop()
+        pending: PendingCommand = PendingCommand(command, timeout if timeout is not None else self.timeout, loop)
+        queue: asyncio.Queue[PendingCommand] = self.queue
+        await queue.put(pending)
+        if queue is not self.queue:
+            # close() ran while we waited for room
+            pending.resolve(APIFailure(error=TMError.WebSocketClosed))
+        return await pending.result
+
+    def observe(self: CommandQueue, event: FieldsetEvent) -> None:
+        # Called with every event of the fieldset, before its handlers see it
+        if (pending := self.inflight) is not None and not pending.confirmed.done() \
+                and pending.matches is not None and pending.matches(event):
+            pending.confirmed.set_result(event)
+        return None
+
+    async def run(self: CommandQueue, queue: asyncio.Queue[PendingCommand]) -> None:
+        # Bound to the queue of its own loop, on_loop() may have moved on to another
+        while True:
+            pending: PendingCommand = await queue.get()
+            if pending.result.done():
+                # Its caller gave up while it was queued
+                continue
+            pending.matches = confirmation(pending.command, self.queued() if self.queued is not None else None)
+            self.inflight = pending
+            try:
+                pending.resolve(await self.execute(pending))
+            finally:
+                if self.inflight is pending:
+                    self.inflight = None
+
+    async def execute(self: CommandQueue, pending: PendingCommand) -> APIResult:
+        started: float = time.monotonic()
+        try:
+            async with asyncio.timeout(pending.timeout):
+                try:
+                    await self.transmit(pending.command.model_dump_json(by_alias=True))
+                except Exception as e:
+                    self.counters.failed += 1
+                    failure: APIFailure = APIFailure(error=TMError.WebSocketClosed, error_details=e)
+                    return self.finish(pending, started, "failed", failure)
+                self.counters.sent += 1
+                if pending.matches is None:
+                    return self.finish(pending, started, "sent", APISuccess[None](data=None, cached=False))
+                event: FieldsetEvent = await pending.confirmed
+        except TimeoutError as e:
+            self.counters.timed_out += 1
+            return self.finish(pending, started, "timeout", APIFailure(error=TMError.CommandTimeout, error_details=e))
+
+        latency: float = time.monotonic() - started
+        self.counters.confirmed += 1
+        self.counters.latency = latency
+        self.counters.max_latency = max(self.counters.max_latency, latency)
+        return self.finish(pending, started, "confirmed", APISuccess[FieldsetEvent](data=event, cached=False))
+
+    def finish(self: CommandQueue, pending: PendingCommand, started: float, outcome: str, rs: APIResult) -> APIResult:
+        if Metrics.registry.enabled:
+            Metrics.observe_command(str(self.fieldset_id), pending.command.cmd, outcome, time.monotonic() - started)
+        return rs
+
+    async def close(self: CommandQueue) -> None:
+        # Everything queued or waiting for confirmation fails with WebSocketClosed
+        worker: asyncio.Task | None = self.worker
+        # Taken before cancelling, the worker clears it on the way out
+        inflight: PendingCommand | None = self.inflight
+        self.worker = None
+        closed: APIFailure = APIFailure(error=TMError.WebSocketClosed)
+        if worker is not None:
+            worker.cancel()
+            if worker.get_loop() is asyncio.get_running_loop():
+                with suppress(asyncio.CancelledError):
+                    await worker
+        if inflight is not None:
+            inflight.resolve(closed)
+        while self.queue is not None and not self.queue.empty():
+            self.queue.get_nowait().resolve(closed)
+        self.queue = None
+        return None
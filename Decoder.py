@@ -0,0 +1,45 @@
+import json
+from typing import Any, Callable
+
+# orjson is optional, when installed it is picked up automatically
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSONLoads = Callable[[bytes], Any]
+
+backend_name: str = "orjson" if orjson is not None else "json"
+# Both backends accept bytes directly, which avoids decoding the body to a str first
+loads: JSONLoads = orjson.loads if orjson is not None else json.loads
+
+
+def use_backend(name: str, func: JSONLoads | None = None) -> None:
+    """Select the JSON backend used to decode response bodies.
+    name is "json", "orjson", or any other name together with a func taking bytes."""
+    global backend_name, loads
+    match name:
+        case "json":
+            loads = json.loads
+        case "orjson":
+            if orjson is None:
+                raise ValueError("orjson is not installed")
+            loads = orjson.loads
+        case _:
+            if func is None:
+                raise ValueError(f"a loads function is required for backend {name}")
+            loads = func
+    backend_name = name
+    return None
+
+
+def decode_json(body: bytes) -> Any:
+    return loads(body)
+
+
+def decode_error_body(body: bytes) -> Any:
+    # Error bodies are not guaranteed to be JSON, fall back to the text
+    try:
+        return loads(body)
+    except ValueError:
+        return body.decode("UTF-8", errors="replace")
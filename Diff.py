@@ -0,0 +1,134 @@
+import inspect
+from collections.abc import Hashable, Sequence
+from typing import Any, Callable
+
+from Dispatcher import EventDispatcher, Subscription, DEFAULT_QUEUE_SIZE
+from Records import raw_records, match_key, team_key, ranking_key
+from Types import (
+    APIResult, APISuccess, APIFailure, TMError, RecordDiff, RecordsChanged, DiffEventTypes, HandlerMode,
+    OverflowPolicy, generic_to_string
+)
+
+
+def diff_records(
+        old: list[dict[str, Any]],
+        new: list[dict[str, Any]],
+        key: Callable[[dict[str, Any]], Hashable]
+) -> RecordDiff:
+    previous: dict[Hashable, dict[str, Any]] = {key(raw): raw for raw in old}
+    diff: RecordDiff = RecordDiff()
+    for raw in new:
+        if (before := previous.pop(key(raw), None)) is None:
+            diff.added.append(raw)
+        elif before is not raw and before != raw:
+            diff.changed.append(raw)
+    diff.removed = list(previous.values())
+    return diff
+
+
+class DiffTracker:
+    """Polls endpoints through a Client or AsyncClient and reports what changed since the previous poll.
+
+    Each non-empty diff is also published as a RecordsChanged event, subscribe with on_diff."""
+
+    def __init__(self: DiffTracker, client):
+        self.client = client  # Of type Client or AsyncClient, not imported to prevent circular imports
+        # Last raw payload seen per endpoint path
+        self.previous: dict[str, list[dict[str, Any]]] = dict()
+        self.listeners: list[Subscription] = []
+        self.dispatcher: EventDispatcher = EventDispatcher(DiffEventTypes)
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["client", "previous", "dispatcher"])
+
+    def track(
+            self: DiffTracker,
+            event_type: str,
+            path: str,
+            rs: APIResult,
+            key: Callable[[dict[str, Any]], Hashable]
+    ) -> APIResult:
+        if not rs.success:
+            return rs
+        if not isinstance(rs.data, Sequence):
+            # A whole response body instead of its list of records, diffing it would walk its keys
+            return APIFailure(error=TMError.InvalidResponse, error_details=f"{path} did not return a list of records")
+        new: list[dict[str, Any]] = raw_records(rs.data)
+        old: list[dict[str, Any]] = self.previous.get(path, [])
+        # A 304 hands back the very same cached list
+        diff: RecordDiff = RecordDiff() if new is old else diff_records(old, new, key)
+        self.previous[path] = new
+        if not diff.empty:
+            self.dispatcher.dispatch(RecordsChanged(type=event_type, path=path, diff=diff))
+        return APISuccess[RecordDiff](data=diff, cached=rs.cached)
+
+    def require_sync(self: DiffTracker) -> None:
+        # Checked before fetching, an AsyncClient's getters would only hand back coroutines
+        if inspect.iscoroutinefunction(self.client.get):
+            raise TypeError("DiffTracker has an AsyncClient, use its *_async methods")
+        return None
+
+    def matches(self: DiffTracker, division) -> APIResult:
+        self.require_sync()
+        return self.track("matchesChanged", f"/api/matches/{division.id}", division.get_matches(), match_key)
+
+    def teams(self: DiffTracker, division) -> APIResult:
+        self.require_sync()
+        return self.track("teamsChanged", f"/api/teams/{division.id}", division.get_teams(), team_key)
+
+    def rankings(self: DiffTracker, division, _round: int) -> APIResult:
+        self.require_sync()
+        return self.track(
+            "rankingsChanged", f"/api/rankings/{division.id}/{_round}", division.get_rankings(_round), ranking_key
+        )
+
+    def skills(self: DiffTracker) -> APIResult:
+        self.require_sync()
+        return self.track("skillsChanged", "/api/skills", self.skills_rankings(self.client.get_skills()), team_key)
+
+    # The *_async methods require self.client to be an AsyncClient
+
+    async def matches_async(self: DiffTracker, division) -> APIResult:
+        return self.track("matchesChanged", f"/api/matches/{division.id}", await division.get_matches_async(), match_key)
+
+    async def teams_async(self: DiffTracker, division) -> APIResult:
+        return self.track("teamsChanged", f"/api/teams/{division.id}", await division.get_teams_async(), team_key)
+
+    async def rankings_async(self: DiffTracker, division, _round: int) -> APIResult:
+        return self.track(
+            "rankingsChanged", f"/api/rankings/{division.id}/{_round}", await division.get_rankings_async(_round),
+            ranking_key
+        )
+
+    async def skills_async(self: DiffTracker) -> APIResult:
+        return self.track("skillsChanged", "/api/skills", self.skills_rankings(await self.client.get_skills()), team_key)
+
+    @staticmethod
+    def skills_rankings(rs: APIResult) -> APIResult:
+        # Raw validation keeps the whole /api/skills body, only its list of rankings is diffed
+        if rs.success and isinstance(rs.data, dict):
+            return APISuccess[Any](data=rs.data["skillsRankings"], cached=rs.cached)
+        return rs
+
+    def on_diff(
+            self: DiffTracker,
+            event_type: str,
+            func: Callable[[RecordsChanged], Any],
+            mode: HandlerMode | None = None,
+            maxsize: int = DEFAULT_QUEUE_SIZE,
+            overflow: OverflowPolicy = OverflowPolicy.DropOldest
+    ) -> Subscription:
+        """func must have exactly one parameter named 'event'
+        DiffTracker will store a reference to func to avoid it being garbage collected
+        Async and Thread handlers need the polls to run on an event loop, see Fieldset.on_event"""
+        if event_type not in DiffEventTypes:
+            raise ValueError(f"event_type must be in {DiffEventTypes}")
+        listener: Subscription = self.dispatcher.subscribe(event_type, func, mode, maxsize, overflow)
+        self.listeners.append(listener)
+        return listener
+
+    def remove_listener(self: DiffTracker, event_type: str, listener: Subscription) -> Subscription:
+        if event_type not in DiffEventTypes:
+            raise ValueError(f"event_type must be in {DiffEventTypes}")
+        self.listeners.remove(listener)
+        return self.dispatcher.unsubscribe(listener)
@@ -0,0 +1,273 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from contextlib import suppress
+from functools import partial
+from typing import Any, Callable, Iterable
+
+from Types import HandlerMode, HandlerStats, OverflowPolicy, generic_to_string
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Subscribing to ANY receives every event type
+ANY: str = "*"
+DEFAULT_QUEUE_SIZE: int = 256
+
+
+class Subscription:
+    """One handler and, unless it runs inline, the bounded queue feeding it.
+
+    Async and Thread handlers are fed by a worker task on the event loop that first dispatched
+    to them, one event at a time and in dispatch order."""
+
+    def __init__(
+            self: Subscription,
+            event_type: str,
+            func: Callable[..., Any],
+            mode: HandlerMode = HandlerMode.Inline,
+            maxsize: int = DEFAULT_QUEUE_SIZE,
+            overflow: OverflowPolicy = OverflowPolicy.DropOldest,
+            executor: Executor | None = None
+    ):
+        self.event_type: str = event_type
+        self.func: Callable[..., Any] = func
+        self.mode: HandlerMode = mode
+        self.maxsize: int = maxsize
+        self.overflow: OverflowPolicy = overflow
+        # None is the event loop's default executor
+        self.executor: Executor | None = executor
+        # (monotonic time dispatched, event)
+        self.queue: deque[tuple[float, Any]] = deque()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.worker: asyncio.Task | None = None
+        self.ready: asyncio.Event = asyncio.Event()
+        self.space: asyncio.Event = asyncio.Event()
+        self.idle: asyncio.Event = asyncio.Event()
+        self.idle.set()
+        self.counters: HandlerStats = HandlerStats(event_type=event_type, mode=mode, overflow=overflow, maxsize=maxsize)
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(
+            *args, **kwargs, ignored_fields=["func", "executor", "queue", "loop", "worker", "ready", "space", "idle"]
+        )
+
+    def getCallable(self: Subscription) -> Callable[..., Any]:
+        # Same accessor as pubsub's Listener, which on_event used to return
+        return self.func
+
+    @property
+    def stats(self: Subscription) -> HandlerStats:
+        return self.counters.model_copy(update={"queue_depth": len(self.queue)})
+
+    def call(self: Subscription, event: Any) -> None:
+        try:
+            self.func(event=event)
+        except Exception:
+            self.counters.failures += 1
+            logger.exception("handler for %s failed", self.event_type)
+        else:
+            self.counters.delivered += 1
+        return None
+
+    def on_loop(self: Subscription) -> bool:
+        # Starts the worker on the running loop the first time, False when called from any other thread
+        try:
+            running: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self.worker is None or self.worker.done() or self.loop.is_closed():
+            if running is None:
+                raise RuntimeError(f"{self.mode} handlers for {self.event_type} need a running event loop")
+            self.loop = running
+            # asyncio.Event binds to the loop it is first awaited on
+            self.ready, self.space, self.idle = asyncio.Event(), asyncio.Event(), asyncio.Event()
+            self.worker = running.create_task(self.run())
+        return running is self.loop
+
+    def on_worker_loop(self: Subscription) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def put(self: Subscription, dispatched_at: float, event: Any) -> bool:
+        # False when the queue is full under the Block policy, the caller decides whether to wait
+        if len(self.queue) >= self.maxsize:
+            match self.overflow:
+                case OverflowPolicy.Block:
+                    return False
+                case OverflowPolicy.DropOldest:
+                    self.queue.popleft()
+                    self.counters.dropped += 1
+                case OverflowPolicy.CoalesceLatest:
+                    # The newest pending event is superseded by this one
+                    self.queue.pop()
+                    self.counters.coalesced += 1
+        self.queue.append((dispatched_at, event))
+        self.idle.clear()
+        self.ready.set()
+        return True
+
+    def put_nowait(self: Subscription, dispatched_at: float, event: Any) -> None:
+        if not self.put(dispatched_at, event):
+            self.counters.dropped += 1
+        return None
+
+    def offer(self: Subscription, event: Any) -> None:
+        """Queues event without waiting, a full Block queue drops it instead."""
+        if self.on_loop():
+            self.put_nowait(time.monotonic(), event)
+        else:
+            self.loop.call_soon_threadsafe(self.put_nowait, time.monotonic(), event)
+        return None
+
+    async def offer_wait(self: Subscription, event: Any) -> None:
+        """Queues event, waiting for room in a full Block queue."""
+        if not self.on_loop():
+            return self.offer(event)
+        dispatched_at: float = time.monotonic()
+        while not self.put(dispatched_at, event):
+            self.space.clear()
+            await self.space.wait()
+        return None
+
+    async def run(self: Subscription) -> None:
+        while True:
+            if not self.queue:
+                self.idle.set()
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            dispatched_at, event = self.queue.popleft()
+            self.space.set()
+            self.counters.lag = time.monotonic() - dispatched_at
+            self.counters.max_lag = max(self.counters.max_lag, self.counters.lag)
+            try:
+                if self.mode == HandlerMode.Thread:
+                    await self.loop.run_in_executor(self.executor, partial(self.func, event=event))
+                elif inspect.isawaitable(result := self.func(event=event)):
+                    await result
+            except Exception:
+                self.counters.failures += 1
+                logger.exception("handler for %s failed", self.event_type)
+            else:
+                self.counters.delivered += 1
+
+    async def join(self: Subscription) -> None:
+        # Returns once every queued event has been handled
+        if self.worker is not None:
+            await self.idle.wait()
+        return None
+
+    def stop(self: Subscription) -> asyncio.Task | None:
+        # Pending events are discarded, the worker starts again on the next dispatch
+        worker: asyncio.Task | None = self.worker
+        if worker is not None:
+            if self.loop.is_closed():
+                worker = None
+            elif self.on_worker_loop():
+                worker.cancel()
+            else:
+                self.loop.call_soon_threadsafe(worker.cancel)
+        self.worker = None
+        self.loop = None
+        self.queue.clear()
+        # Releases anyone waiting in offer_wait or join
+        self.space.set()
+        self.idle.set()
+        return worker
+
+
+class EventDispatcher:
+    """Routes events straight to the handlers subscribed to their type.
+
+    Handlers are called as func(event=event), like the pubsub listeners they replace.
+    A handler that raises is logged and does not stop the remaining handlers.
+
+    Inline handlers run inside dispatch. Async and Thread handlers each get a bounded queue,
+    so a slow handler only falls behind itself, see OverflowPolicy for what happens when it is full."""
+
+    def __init__(self: EventDispatcher, event_types: Iterable[str], executor: Executor | None = None):
+        self.event_types: tuple[str, ...] = tuple(event_types)
+        self.executor: Executor | None = executor
+        self.handlers: dict[str, list[Subscription]] = {t: [] for t in (*self.event_types, ANY)}
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["handlers", "executor"])
+
+    def subscribe(
+            self: EventDispatcher,
+            event_type: str,
+            func: Callable[..., Any],
+            mode: HandlerMode | None = None,
+            maxsize: int = DEFAULT_QUEUE_SIZE,
+            overflow: OverflowPolicy = OverflowPolicy.DropOldest
+    ) -> Subscription:
+        """mode defaults to Async for coroutine functions and Inline for everything else."""
+        if event_type not in self.handlers:
+            raise ValueError(f"event_type must be in {self.event_types} or {ANY!r}")
+        is_coroutine: bool = inspect.iscoroutinefunction(func)
+        if mode is None:
+            mode = HandlerMode.Async if is_coroutine else HandlerMode.Inline
+        elif is_coroutine and mode != HandlerMode.Async:
+            raise ValueError(f"coroutine handlers must use {HandlerMode.Async}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        subscription: Subscription = Subscription(event_type, func, mode, maxsize, overflow, self.executor)
+        # Copy on write, dispatch may be iterating over the old list
+        self.handlers[event_type] = [*self.handlers[event_type], subscription]
+        return subscription
+
+    def unsubscribe(self: EventDispatcher, subscription: Subscription) -> Subscription:
+        self.handlers[subscription.event_type] = [
+            s for s in self.handlers[subscription.event_type] if s is not subscription
+        ]
+        subscription.stop()
+        return subscription
+
+    def subscriptions(self: EventDispatcher, event: Any) -> list[Subscription]:
+        return [*self.handlers.get(event.type, ()), *self.handlers[ANY]]
+
+    def dispatch(self: EventDispatcher, event: Any) -> None:
+        # Never waits, a full Block queue drops the event, use publish from a coroutine to wait instead
+        for subscription in self.subscriptions(event):
+            if subscription.mode == HandlerMode.Inline:
+                subscription.call(event)
+            else:
+                subscription.offer(event)
+        return None
+
+    async def publish(self: EventDispatcher, event: Any) -> None:
+        # Like dispatch, but waits for room in full Block queues, which holds back the caller
+        for subscription in self.subscriptions(event):
+            if subscription.mode == HandlerMode.Inline:
+                subscription.call(event)
+            else:
+                await subscription.offer_wait(event)
+        return None
+
+    async def join(self: EventDispatcher) -> None:
+        for subscriptions in list(self.handlers.values()):
+            for subscription in subscriptions:
+                await subscription.join()
+        return None
+
+    async def close(self: EventDispatcher) -> None:
+        # Stops every worker, subscriptions stay registered and restart on the next dispatch
+        workers: list[asyncio.Task] = [
+            worker for subscriptions in self.handlers.values() for s in subscriptions
+            if (worker := s.stop()) is not None
+        ]
+        running: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        for worker in workers:
+            if worker.get_loop() is running:
+                with suppress(asyncio.CancelledError):
+                    await worker
+        return None
+
+    @property
+    def stats(self: EventDispatcher) -> list[HandlerStats]:
+        return [s.stats for subscriptions in self.handlers.values() for s in subscriptions]
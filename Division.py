@@ -1,29 +1,45 @@
-from Types import DivisionData, APIResult, numeric, generic_to_string
+import inspect
+
+from Types import DivisionData, APIResult, numeric, generic_to_string, Team, Match, Ranking
+from Records import as_typed
 
 
 class Division:
     def __init__(self: Division, client, data: DivisionData):
         self.id: numeric = data.id
         self.name: str = data.name
-        self.client = client  # of type Client, not imported to prevent circular imports
+        self.client = client  # of type Client or AsyncClient, not imported to prevent circular imports
 
     def __str__(*args, indent="", **kwargs):
         return generic_to_string(*args, **kwargs, ignored_fields=["client"])
 
-    def get_teams(self: Division) -> APIResult:
-        rs: APIResult = self.client.get(f"/api/teams/{self.id}")
+    def unwrap(self: Division, rs: APIResult, key: str, model: type) -> APIResult:
         if rs.success:
-            rs.data = rs.data["teams"]
-        return rs
+            rs.data = rs.data[key]
+        return as_typed(rs, model, self.client.connection_args.validation)
+
+    def sync_client(self: Division):
+        # An AsyncClient's get hands back a coroutine, the sync getters cannot unwrap it
+        if inspect.iscoroutinefunction(self.client.get):
+            raise TypeError(f"Division {self.id} belongs to an AsyncClient, use the *_async getters")
+        return self.client
+
+    def get_teams(self: Division) -> APIResult:
+        return self.unwrap(self.sync_client().get(f"/api/teams/{self.id}"), "teams", Team)
 
     def get_matches(self: Division) -> APIResult:
-        rs: APIResult = self.client.get(f"/api/matches/{self.id}")
-        if rs.success:
-            rs.data = rs.data["matches"]
-        return rs
+        return self.unwrap(self.sync_client().get(f"/api/matches/{self.id}"), "matches", Match)
 
     def get_rankings(self: Division, _round: int) -> APIResult:
-        rs: APIResult = self.client.get(f"/api/rankings/{self.id}/{_round}")
-        if rs.success:
-            rs.data = rs.data["rankings"]
-        return rs
+        return self.unwrap(self.sync_client().get(f"/api/rankings/{self.id}/{_round}"), "rankings", Ranking)
+
+    # The *_async getters require self.client to be an AsyncClient
+
+    async def get_teams_async(self: Division) -> APIResult:
+        return self.unwrap(await self.client.get(f"/api/teams/{self.id}"), "teams", Team)
+
+    async def get_matches_async(self: Division) -> APIResult:
+        return self.unwrap(await self.client.get(f"/api/matches/{self.id}"), "matches", Match)
+
+    async def get_rankings_async(self: Division, _round: int) -> APIResult:
+        return self.unwrap(await self.client.get(f"/api/rankings/{self.id}/{_round}"), "rankings", Ranking)
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from typing import TYPE_CHECKING
+
+from Types import CacheArgs, EndpointCacheMember, EndpointCacheStats, generic_to_string
+
+if TYPE_CHECKING:
+    from CacheStore import SQLiteCacheStore
+
+
+class EndpointCache:
+    """LRU cache of endpoint responses used for If-Modified-Since requests.
+
+    Bounded by entry count and body bytes, with an optional TTL after which an
+    entry is dropped and the endpoint is fetched unconditionally again.
+    With CacheArgs.persist_path set, members survive restarts in a SQLiteCacheStore."""
+
+    def __init__(self: EndpointCache, args: CacheArgs | None = None):
+        self.args: CacheArgs = args if args is not None else CacheArgs()
+        self.store_backend: SQLiteCacheStore | None = None
+        if self.args.persist_path is not None:
+            # sqlite3 is only loaded for a persistent cache
+            from CacheStore import SQLiteCacheStore
+            self.store_backend = SQLiteCacheStore(self.args.persist_path)
+        self.loaded: bool = self.store_backend is None
+        self.members: OrderedDict[str, EndpointCacheMember] = OrderedDict()
+        # Monotonic time each member was stored, for the TTL
+        self.stored_at: dict[str, float] = dict()
+        self.size: int = 0
+        self.lock: threading.RLock = threading.RLock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.not_modified: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self.invalidations: int = 0
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["members", "stored_at", "lock"])
+
+    def __contains__(self: EndpointCache, url: str) -> bool:
+        self.load()
+        return url in self.members
+
+    def __len__(self: EndpointCache) -> int:
+        self.load()
+        return len(self.members)
+
+    def keys(self: EndpointCache) -> list[str]:
+        self.load()
+        with self.lock:
+            return list(self.members.keys())
+
+    def load(self: EndpointCache) -> None:
+        # Persisted members are read on first access rather than when the Client is built
+        if self.loaded:
+            return None
+        with self.lock:
+            if not self.loaded:
+                now: float = time.monotonic()
+                for url, member in self.store_backend.load().items():
+                    self.members[url] = member
+                    self.stored_at[url] = now
+                    self.size += member.size
+                self.loaded = True
+                self.evict()
+        return None
+
+    def lookup(self: EndpointCache, url: str) -> EndpointCacheMember | None:
+        self.load()
+        with self.lock:
+            if (member := self.members.get(url)) is None:
+                self.misses += 1
+                return None
+            if self.args.ttl is not None \
+                    and time.monotonic() - self.stored_at[url] > self.args.ttl.total_seconds():
+                self.remove(url)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.members.move_to_end(url)
+            self.hits += 1
+            return member
+
+    def record_not_modified(self: EndpointCache, url: str) -> None:
+        with self.lock:
+            self.not_modified += 1
+            if url in self.members:
+                self.members.move_to_end(url)
+        return None
+
+    def store(self: EndpointCache, url: str, member: EndpointCacheMember) -> None:
+        self.load()
+        with self.lock:
+            if (previous := self.members.pop(url, None)) is not None:
+                self.size -= previous.size
+            self.members[url] = member
+            self.stored_at[url] = time.monotonic()
+            self.size += member.size
+            if self.store_backend is not None:
+                self.store_backend.put(url, member)
+            self.evict()
+        return None
+
+    def remove(self: EndpointCache, url: str) -> EndpointCacheMember | None:
+        with self.lock:
+            if (member := self.members.pop(url, None)) is not None:
+                del self.stored_at[url]
+                self.size -= member.size
+                if self.store_backend is not None:
+                    self.store_backend.delete(url)
+            return member
+
+    def evict(self: EndpointCache) -> None:
+        # Least recently used first, the newest member is always kept even if it alone exceeds max_bytes
+        max_entries, max_bytes = self.args.max_entries, self.args.max_bytes
+        while len(self.members) > 1 and (
+                (max_entries is not None and len(self.members) > max_entries)
+                or (max_bytes is not None and self.size > max_bytes)
+        ):
+            self.remove(next(iter(self.members)))
+            self.evictions += 1
+        return None
+
+    def invalidate(self: EndpointCache, prefix: str = "") -> int:
+        """Drop every member whose URL path starts with prefix, e.g. "/api/rankings/1/".
+        Returns the number of members dropped, an empty prefix clears the cache."""
+        self.load()
+        with self.lock:
+            urls: list[str] = [url for url in self.members if urlsplit(url).path.startswith(prefix)]
+            for url in urls:
+                self.remove(url)
+            self.invalidations += len(urls)
+            return len(urls)
+
+    def clear(self: EndpointCache) -> None:
+        self.invalidate()
+        return None
+
+    def flush(self: EndpointCache) -> None:
+        if self.store_backend is not None:
+            self.store_backend.flush()
+        return None
+
+    def close(self: EndpointCache) -> None:
+        # Waits for pending writes to reach disk
+        if self.store_backend is not None:
+            self.store_backend.close()
+        return None
+
+    @property
+    def stats(self: EndpointCache) -> EndpointCacheStats:
+        with self.lock:
+            return EndpointCacheStats(
+                entries=len(self.members),
+                size=self.size,
+                hits=self.hits,
+                misses=self.misses,
+                not_modified=self.not_modified,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                invalidations=self.invalidations
+            )
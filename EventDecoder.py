@@ -0,0 +1,135 @@
+import logging
+from typing import Any, Callable, Sequence
+
+from pydantic import BaseModel
+
+import Decoder
+from Types import (
+    FieldsetEvent, FieldMatchAssigned, FieldActivated, MatchStarted, MatchStopped, AudienceDisplayChanged,
+    AudienceDisplay, MatchRound, MatchTuple
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# A websocket message, text frames arrive as str and binary frames as bytes
+Frame = str | bytes
+EventBuilder = Callable[[dict[str, Any]], FieldsetEvent]
+
+# Value -> member lookups, cheaper than calling the enum and catching ValueError
+DISPLAYS: dict[str, AudienceDisplay] = {d.value: d for d in AudienceDisplay}
+ROUNDS: dict[str, MatchRound] = {r.value: r for r in MatchRound}
+
+
+def constructor[M: BaseModel](model: type[M]) -> Callable[..., M]:
+    """Builds instances of model without validation, like model_construct.
+
+    model_construct looks up every field and its alias on each call, which makes it slower than
+    validating. Here the defaults are collected once, so a call only fills the instance dict."""
+    defaults: dict[str, Any] = {
+        name: field.default for name, field in model.model_fields.items() if not field.is_required()
+    }
+    new: Callable[[type[M]], M] = model.__new__
+    setattr_: Callable[[object, str, Any], None] = object.__setattr__
+
+    def construct(**values: Any) -> M:
+        instance: M = new(model)
+        setattr_(instance, "__dict__", {**defaults, **values})
+        setattr_(instance, "__pydantic_fields_set__", set(values))
+        setattr_(instance, "__pydantic_extra__", None)
+        setattr_(instance, "__pydantic_private__", None)
+        return instance
+    return construct
+
+
+new_match_tuple: Callable[..., MatchTuple] = constructor(MatchTuple)
+new_field_match_assigned: Callable[..., FieldMatchAssigned] = constructor(FieldMatchAssigned)
+new_field_activated: Callable[..., FieldActivated] = constructor(FieldActivated)
+new_match_started: Callable[..., MatchStarted] = constructor(MatchStarted)
+new_match_stopped: Callable[..., MatchStopped] = constructor(MatchStopped)
+new_audience_display_changed: Callable[..., AudienceDisplayChanged] = constructor(AudienceDisplayChanged)
+
+
+def match_tuple(value: dict[str, Any] | None) -> MatchTuple | None:
+    # A missing or empty match is a timeout, or no assignment at all
+    if not value:
+        return None
+    _round: str | int = value.get("round")
+    return new_match_tuple(
+        session=value.get("session"),
+        division=value.get("division"),
+        round=ROUNDS.get(_round, _round) if isinstance(_round, str) else _round,
+        instance=value.get("instance"),
+        match=value.get("match")
+    )
+
+
+# Tournament Manager's own JSON is trusted, events are built without revalidation.
+# Only a missing or null fieldID means no field, field 0 is a real field.
+
+def field_match_assigned(data: dict[str, Any]) -> FieldMatchAssigned:
+    return new_field_match_assigned(
+        field_id=data.get("fieldID"),
+        match=match_tuple(data.get("match"))
+    )
+
+
+def field_activated(data: dict[str, Any]) -> FieldActivated:
+    return new_field_activated(field_id=data.get("fieldID"))
+
+
+def match_started(data: dict[str, Any]) -> MatchStarted:
+    return new_match_started(field_id=data.get("fieldID"))
+
+
+def match_stopped(data: dict[str, Any]) -> MatchStopped:
+    return new_match_stopped(field_id=data.get("fieldID"))
+
+
+def audience_display_changed(data: dict[str, Any]) -> AudienceDisplayChanged:
+    # A display this client does not know about is reported as None
+    return new_audience_display_changed(display=DISPLAYS.get(data.get("display")))
+
+
+BUILDERS: dict[str, EventBuilder] = {
+    "fieldMatchAssigned": field_match_assigned,
+    "fieldActivated": field_activated,
+    "matchStarted": match_started,
+    "matchStopped": match_stopped,
+    "audienceDisplayChanged": audience_display_changed
+}
+
+
+def decode_event(data: dict[str, Any]) -> FieldsetEvent | None:
+    # Message types this client does not handle are ignored
+    if (builder := BUILDERS.get(data.get("type"))) is None:
+        return None
+    return builder(data)
+
+
+def decode_frame(frame: Frame) -> FieldsetEvent | None:
+    return decode_event(Decoder.loads(frame))
+
+
+def join_frames(frames: Sequence[Frame]) -> Frame:
+    # Wrapped into one JSON array so the whole batch is a single loads call
+    if all(isinstance(frame, str) for frame in frames):
+        return "[" + ",".join(frames) + "]"
+    return b"[" + b",".join(f.encode("UTF-8") if isinstance(f, str) else f for f in frames) + b"]"
+
+
+def decode_batch(frames: Sequence[Frame]) -> list[FieldsetEvent]:
+    """Decodes queued frames in one go, in order, leaving out message types that are not handled.
+
+    A frame that is not valid JSON is logged and skipped rather than losing the rest of the batch."""
+    if not frames:
+        return []
+    try:
+        messages: list[dict[str, Any]] = Decoder.loads(join_frames(frames))
+    except ValueError:
+        messages: list[dict[str, Any]] = []
+        for frame in frames:
+            try:
+                messages.append(Decoder.loads(frame))
+            except ValueError:
+                logger.warning("skipping undecodable fieldset frame %r", frame[:64])
+    return [event for data in messages if (event := decode_event(data)) is not None]
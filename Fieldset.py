@@ -1,15 +1,34 @@
-from Types import *
+from Types import (
+    APIResult, APISuccess, APIFailure, TMError, ReconnectArgs, Field, FieldsetData, FieldsetEventTypes, FieldsetEvent,
+    FieldsetState, FieldsetMatchActiveNone, FieldsetMatchActiveTimeout, FieldsetMatchActiveMatch, FieldsetCommand,
+    StartMatch, EndMatchEarly, AbortMatch, ResetTimer, QueuePreviousMatch, QueueNextMatch, QueueSkills,
+    SetAudienceDisplay, AudienceDisplay, ActiveMatchType, QueueState, QueueSkillsType, HandlerMode, OverflowPolicy,
+    ConnectionStats, CommandStats, HandlerStats, numeric, generic_to_string
+)
 import asyncio
-import json
+import datetime
+import inspect
+import logging
+import random
+import time
 from asyncio import Task
 from contextlib import suppress
-from typing import Callable, Any
+from typing import Callable, Any, TYPE_CHECKING
 from urllib.parse import urlparse, ParseResult
 
-import websockets
-from pubsub import pub
-from pubsub.core import Listener
-from websockets import ClientConnection
+# websockets is imported by the methods that open sockets, importing a Client does not load it
+if TYPE_CHECKING:
+    from websockets import ClientConnection
+
+import Metrics
+from CommandQueue import CommandQueue
+from Dispatcher import EventDispatcher, Subscription, ANY, DEFAULT_QUEUE_SIZE
+from EventDecoder import Frame, decode_event, decode_frame
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Every event of every Fieldset is also dispatched here, for consumers that want one aggregate stream
+global_dispatcher: EventDispatcher = EventDispatcher(FieldsetEventTypes)
 
 
 
@@ -18,19 +37,34 @@ class Fieldset:
     def __init__(self: Fieldset, client, data: FieldsetData):
         self.id: numeric = data.id
         self.name: str = data.name
-        self.client = client  # Of type Client, not imported to prevent circular imports
+        self.client = client  # Of type Client or AsyncClient, not imported to prevent circular imports
         self.websocket: ClientConnection | None = None
-        self.listeners: list[dict] = []
+        self.listeners: list[Subscription] = []
+        self.dispatcher: EventDispatcher = EventDispatcher(FieldsetEventTypes)
         self.state: FieldsetState = FieldsetState(
             match=FieldsetMatchActiveNone(),
             audience_display=AudienceDisplay.Blank
         )
+        self.stats: ConnectionStats = ConnectionStats()
+        self.listen_task: Task | None = None
+        self.closing: bool = False
+        self.commands: CommandQueue = CommandQueue(self.id, self.transmit, queued=lambda: self.state.match)
 
     def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs, ignored_fields=["client"])
+        return generic_to_string(*args, **kwargs, ignored_fields=["client", "listen_task", "dispatcher", "commands"])
 
     def get_fields(self: Fieldset) -> APIResult:
-        rs: APIResult = self.client.get(f"/api/fieldsets/{self.id}/fields")
+        # An AsyncClient's get hands back a coroutine, see get_fields_async
+        if inspect.iscoroutinefunction(self.client.get):
+            raise TypeError(f"Fieldset {self.id} belongs to an AsyncClient, use get_fields_async")
+        return self.unwrap_fields(self.client.get(f"/api/fieldsets/{self.id}/fields"))
+
+    async def get_fields_async(self: Fieldset) -> APIResult:
+        # Requires self.client to be an AsyncClient
+        return self.unwrap_fields(await self.client.get(f"/api/fieldsets/{self.id}/fields"))
+
+    @staticmethod
+    def unwrap_fields(rs: APIResult) -> APIResult:
         if rs.success:
             data: list[Field] = [Field(id=f["id"], name=f["name"]) for f in rs.data["fields"]]
             return APISuccess[list[Field]](
@@ -40,9 +74,17 @@ class Fieldset:
         return rs
 
     def update_state(self: Fieldset, event: FieldsetEvent) -> None:
+        # The first event after a reconnect, the state is being brought up to date again
+        was_stale: bool = self.state.stale
+        self.state.stale = False
         match event.type:
             case "audienceDisplayChanged":
-                self.state.audience_display = event.display
+                # An unknown display decodes to None, keep the last known one
+                if event.display is not None:
+                    self.state.audience_display = event.display
+            case "fieldMatchAssigned" if was_stale and self.is_assigned(event):
+                # Tournament Manager re-sends the assignment on connect, keep what is known of that match
+                pass
             case "fieldMatchAssigned":
                 is_none: bool = event.match is None and event.field_id is None
                 if is_none:
@@ -93,16 +135,21 @@ class Fieldset:
                         self.state.match.state = QueueState.Stopped
         return None
 
-    async def connect(self: Fieldset) -> APIResult:
-        if not (rs:=self.client.bearer.ensure()).success:
-            return rs
-
+    def uri(self: Fieldset) -> str:
         # url protocol should be "ws"
         base: ParseResult = urlparse(self.client.connection_args.address)
         base = base._replace(scheme="ws")
         path: str = f"/api/fieldsets/{self.id}"
         base = base._replace(path=path)
-        uri: str = base.geturl()
+        return base.geturl()
+
+    async def open_socket(self: Fieldset) -> ClientConnection:
+        import websockets
+        # Signed afresh on every (re)connect, the bearer or the x-tm-date may have moved on
+        if not self.client.bearer.is_viable():
+            if not (rs:=await asyncio.to_thread(self.client.bearer.ensure)).success:
+                raise ConnectionError(rs.error)
+        uri: str = self.uri()
         auth_headers: dict = self.client.get_authorization_headers(uri)
 
         # After examining the packets with Wireshark, I noticed duplication of the Host header.
@@ -110,13 +157,29 @@ class Fieldset:
         # DWAB's Tournament Manager rejects with 401 unless I deduplicate this header.
         del auth_headers["Host"]
 
+        return await websockets.connect(uri, additional_headers=auth_headers)
+
+    async def connect(self: Fieldset, supervise: bool = True) -> APIResult:
+        """With supervise, a dropped connection is re-established with jittered exponential backoff
+        (ClientArgs.reconnect_args) until disconnect() is called."""
+        import websockets
+        from websockets import ClientConnection
+        if self.listen_task is not None and not self.listen_task.done() and self.websocket is not None:
+            # Already connected, a second listen task would read the same socket
+            return APISuccess[ClientConnection](
+                data=self.websocket,
+                cached=False
+            )
+        # Off the loop, a due refresh is a blocking HTTP fetch
+        if not (rs:=await asyncio.to_thread(self.client.bearer.ensure)).success:
+            return rs
+
         try:
-            self.websocket = await websockets.connect(uri, additional_headers=auth_headers)
+            self.closing = False
+            self.websocket = await self.open_socket()
+            self.set_connected(True)
             # Should live in the event loop forever
-            asyncio.create_task(self.listen_loop())
-            # Subscribe basic send and receive handlers
-            pub.subscribe(self.ws_receiver, "ws_receive")
-            pub.subscribe(self.ws_transmitter, "ws_transmit")
+            self.listen_task = asyncio.create_task(self.supervise_loop() if supervise else self.listen_loop())
             return APISuccess[ClientConnection](
                 data=self.websocket,
                 cached=False
@@ -126,122 +189,230 @@ class Fieldset:
                 error=TMError.WebSocketInvalidURL,
                 error_details=e
             )
-        except TimeoutError as e:  # | OSError | InvalidHandshake ...but python complains about inheritance
+        except (OSError, websockets.exceptions.InvalidHandshake) as e:
+            # OSError covers TimeoutError, refused connections and the ConnectionError of a failed bearer
             return APIFailure(
                 error=TMError.WebSocketError,
                 error_details=e
             )
 
+    async def supervise_loop(self: Fieldset) -> None:
+        import websockets
+        args: ReconnectArgs = self.client.connection_args.reconnect_args
+        while not self.closing:
+            try:
+                await self.listen_loop()
+            except websockets.exceptions.ConnectionClosed as e:
+                self.stats.last_error = e
+            except Exception as e:
+                # Anything else that breaks the socket, drop it and reconnect rather than stop supervising
+                logger.exception("fieldset %s: websocket failed", self.id)
+                self.stats.last_error = e
+                if self.websocket is not None:
+                    with suppress(Exception):
+                        await self.websocket.close()
+            if self.closing:
+                break
+
+            # The socket dropped, everything in self.state may be out of date until we are back
+            self.set_connected(False)
+            self.stats.last_disconnect = datetime.datetime.now(datetime.UTC)
+            self.state.stale = True
+            lost_at: float = time.monotonic()
+
+            delay: float = args.initial_delay
+            while not self.closing:
+                await asyncio.sleep(delay * random.uniform(1 - args.jitter, 1 + args.jitter))
+                self.stats.reconnect_attempts += 1
+                try:
+                    self.websocket = await self.open_socket()
+                    break
+                except (OSError, TimeoutError, websockets.exceptions.WebSocketException) as e:
+                    self.stats.last_error = e
+                    delay = min(args.max_delay, delay * args.multiplier)
+            if self.closing:
+                break
+
+            self.set_connected(True)
+            self.stats.reconnects += 1
+            if Metrics.registry.enabled:
+                Metrics.fieldset_reconnects.inc(str(self.id))
+            self.stats.downtime += datetime.timedelta(seconds=time.monotonic() - lost_at)
+            # self.state keeps the last known match and audience display and stays stale until the first event.
+            # Tournament Manager only re-sends the queued assignment after connecting, not what happened to it
+        return None
+
+    def set_connected(self: Fieldset, connected: bool) -> None:
+        self.stats.connected = connected
+        if Metrics.registry.enabled:
+            Metrics.fieldset_connected.set(int(connected), str(self.id))
+        return None
+
+    def is_assigned(self: Fieldset, event: FieldsetEvent) -> bool:
+        # Whether event assigns the match and field self.state already has
+        match self.state.match.type:
+            case ActiveMatchType.Match:
+                return event.match == self.state.match.match and event.field_id == self.state.match.field_id
+            case ActiveMatchType.Timeout:
+                return event.match is None and event.field_id == self.state.match.field_id
+        return False
+
     @staticmethod
     def get_fieldset_event(data: dict[str, Any]) -> FieldsetEvent | None:
-        match data["type"]:
-            case "fieldMatchAssigned":
-                return FieldMatchAssigned(
-                    field_id=data["fieldID"],
-                    match=data["match"]
-                )
-            case "fieldActivated":
-                return FieldActivated(
-                    field_id=data["fieldID"],
-                )
-            case "matchStarted":
-                return MatchStarted(
-                    field_id=data["fieldID"]
-                )
-            case "matchStopped":
-                return MatchStopped(
-                    field_id=data["fieldID"]
-                )
-            case "audienceDisplayChanged":
-                return AudienceDisplayChanged(
-                    display=data["display"]
-                )
-        return None
+        return decode_event(data)
 
     async def listen_loop(self: Fieldset) -> None:
         if self.websocket is not None:
             # An infinite async iterator
             async for response in self.websocket:
-                # turn data into a FieldSetEvent
-                data: dict[str, Any] = json.loads(response)
-                data = {k: v if v else None for k, v in data.items()}
-                event: FieldsetEvent = Fieldset.get_fieldset_event(data)
-                pub.sendMessage("ws_receive", event=event)
+                try:
+                    if (journal := self.client.journal) is not None:
+                        journal.record_frame(self.id, response)
+                    await self.handle_frame(response)
+                except Exception as e:
+                    # One bad frame, or a failing handler, must not end the connection
+                    logger.exception("fieldset %s: dropping frame %r", self.id, response[:64])
+                    self.stats.last_error = e
+        return None
+
+    async def handle_frame(self: Fieldset, frame: Frame) -> None:
+        # Live frames and journal replays both come through here
+        if not Metrics.registry.enabled:
+            # turn data into a FieldSetEvent
+            if (event := decode_frame(frame)) is not None:
+                await self.ws_receiver(event)
+            return None
+
+        label: str = str(self.id)
+        started: float = time.perf_counter()
+        event: FieldsetEvent | None = decode_frame(frame)
+        decoded: float = time.perf_counter()
+        Metrics.fieldset_messages.inc(label)
+        Metrics.fieldset_decode_seconds.observe(decoded - started, label)
+        if event is not None:
+            # Includes waiting for room in full Block queues
+            await self.ws_receiver(event)
+            Metrics.fieldset_handler_seconds.observe(time.perf_counter() - decoded, label)
         return None
 
-    def ws_receiver(self: Fieldset, event: FieldsetEvent) -> None:
+    async def ws_receiver(self: Fieldset, event: FieldsetEvent) -> None:
+        # Only this fieldset's state and listeners see the event, then the aggregate stream
+        event.fieldset_id = self.id
         # update self state
         self.update_state(event)
+        # A command waiting on this event is confirmed before any handler runs
+        self.commands.observe(event)
         # emit the event type and data
-        pub.sendMessage(event.type, event=event)
+        # A full Block queue holds back reading the socket until its handler catches up
+        await self.dispatcher.publish(event)
+        await global_dispatcher.publish(event)
         return None
 
-    async def ws_transmitter(self: Fieldset, data: str) -> Task:
-        async def speak(msg):
-            with suppress(websockets.exceptions.ConnectionClosedOK):
-                await self.websocket.send(msg)
-        # Create a send task and schedule it for execution
-        # We expect to send whenever the event loop is willing to yield control
-        # It is important to handle exceptions from the Task to prevent it from crashing everything
-        return asyncio.create_task(speak(data))
+    async def transmit(self: Fieldset, message: str) -> None:
+        # Raises when the socket is gone, CommandQueue turns that into a WebSocketClosed failure
+        if self.websocket is None:
+            raise ConnectionError(TMError.WebSocketClosed)
+        await self.websocket.send(message)
+        return None
 
     async def disconnect(self: Fieldset) -> None:
+        self.closing = True
         if self.websocket is not None:
             await self.websocket.close()
+        if self.listen_task is not None:
+            self.listen_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.listen_task
+            self.listen_task = None
+        # Events still queued for handlers are discarded, commands not yet confirmed fail
+        await self.dispatcher.close()
+        await self.commands.close()
+        self.set_connected(False)
         return None
 
-    async def send(self: Fieldset, cmd: FieldsetCommand) -> APIResult:
-        message: str = json.dumps(cmd)
-        try:
-            snd_task = self.ws_transmitter(message)
-        except Exception as e:
-            raise e  # Later, cast to TMError as appropriate
-        return APISuccess(
-            data=None,
-            cached=False
-        )
+    async def send(self: Fieldset, cmd: FieldsetCommand, timeout: float | None = None) -> APIResult:
+        """Queues cmd behind any earlier commands and waits until Tournament Manager confirms it.
 
-    def on_event(self: Fieldset, event_type: str, func: Callable[[FieldsetEvent], Any]) -> Listener:
+        Succeeds with the confirming event, or None for commands without one (reset).
+        Fails with WebSocketClosed if it could not be sent and CommandTimeout if it was not
+        confirmed within timeout seconds, CommandQueue.timeout by default."""
+        return await self.commands.submit(cmd, timeout)
+
+    def on_event(
+            self: Fieldset,
+            event_type: str,
+            func: Callable[[FieldsetEvent], Any],
+            mode: HandlerMode | None = None,
+            maxsize: int = DEFAULT_QUEUE_SIZE,
+            overflow: OverflowPolicy = OverflowPolicy.DropOldest
+    ) -> Subscription:
         """func must have exactly one parameter named 'event'
         Fieldset will store a reference to func to avoid it being garbage collected
+        event_type may also be Dispatcher.ANY to receive every event of this fieldset
+
+        mode defaults to Async for coroutine functions and Inline otherwise. Use Thread for
+        blocking handlers, such as database writes, so they do not hold up the event loop.
+        Async and Thread handlers get a queue of maxsize events, full queues follow overflow
 
         Note for control flow. Any call to this function subscribes the passed
         func to the give event_type until the listener is removed with remove_listener"""
-        if event_type not in FieldsetEventTypes:
+        if event_type not in FieldsetEventTypes and event_type != ANY:
             raise ValueError(f"event_type must be in {FieldsetEventTypes}")
         else:
-            listener: Listener = pub.subscribe(listener=func, topicName=event_type)
-            self.listeners.append({ "topic": event_type, "listener": listener, "origin_func": func})
+            listener: Subscription = self.dispatcher.subscribe(event_type, func, mode, maxsize, overflow)
+            self.listeners.append(listener)
             return listener
 
-    def remove_listener(self: Fieldset, event_type: str, listener: Listener) -> Listener:
-        if event_type not in FieldsetEventTypes:
+    def remove_listener(self: Fieldset, event_type: str, listener: Subscription) -> Subscription:
+        if event_type not in FieldsetEventTypes and event_type != ANY:
             raise ValueError(f"event_type must be in {FieldsetEventTypes}")
-        self.listeners.remove({ "topic": event_type, "listener": listener, "origin_func": listener.getCallable()})
-        listener: Listener = pub.unsubscribe(event_type, listener)
-        return listener
+        self.listeners.remove(listener)
+        return self.dispatcher.unsubscribe(listener)
 
+    @staticmethod
+    def on_global_event(
+            event_type: str,
+            func: Callable[[FieldsetEvent], Any],
+            mode: HandlerMode | None = None,
+            maxsize: int = DEFAULT_QUEUE_SIZE,
+            overflow: OverflowPolicy = OverflowPolicy.DropOldest
+    ) -> Subscription:
+        # Events of every fieldset, event.fieldset_id tells them apart
+        return global_dispatcher.subscribe(event_type, func, mode, maxsize, overflow)
+
+    @property
+    def command_stats(self: Fieldset) -> CommandStats:
+        return self.commands.stats
+
+    @property
+    def handler_stats(self: Fieldset) -> list[HandlerStats]:
+        # Queue depth and lag of each handler registered with on_event
+        return self.dispatcher.stats
+
+    @staticmethod
+    def remove_global_listener(listener: Subscription) -> Subscription:
+        return global_dispatcher.unsubscribe(listener)
 
-    async def start_match(self: Fieldset, field_id: numeric) -> APIResult:
-        return await self.send(StartMatch(field_id=field_id))
+    async def start_match(self: Fieldset, field_id: numeric, timeout: float | None = None) -> APIResult:
+        return await self.send(StartMatch(field_id=field_id), timeout)
 
-    async def end_match_early(self: Fieldset, field_id: numeric) -> APIResult:
-        return await self.send(EndMatchEarly(field_id=field_id))
+    async def end_match_early(self: Fieldset, field_id: numeric, timeout: float | None = None) -> APIResult:
+        return await self.send(EndMatchEarly(field_id=field_id), timeout)
 
-    async def abort_match(self: Fieldset, field_id: numeric) -> APIResult:
-        return await self.send(AbortMatch(field_id=field_id))
+    async def abort_match(self: Fieldset, field_id: numeric, timeout: float | None = None) -> APIResult:
+        return await self.send(AbortMatch(field_id=field_id), timeout)
 
-    async def reset_timer(self: Fieldset, field_id: numeric) -> APIResult:
-        return await self.send(ResetTimer(field_id=field_id))
+    async def reset_timer(self: Fieldset, field_id: numeric, timeout: float | None = None) -> APIResult:
+        return await self.send(ResetTimer(field_id=field_id), timeout)
 
-    async def queue_previous_match(self: Fieldset) -> APIResult:
-        return await self.send(QueuePreviousMatch())
+    async def queue_previous_match(self: Fieldset, timeout: float | None = None) -> APIResult:
+        return await self.send(QueuePreviousMatch(), timeout)
 
-    async def queue_next_match(self: Fieldset) -> APIResult:
-        return await self.send(QueueNextMatch())
+    async def queue_next_match(self: Fieldset, timeout: float | None = None) -> APIResult:
+        return await self.send(QueueNextMatch(), timeout)
 
-    async def queue_skills(self: Fieldset, skills_id: QueueSkillsType) -> APIResult:
-        return await self.send(QueueSkills(skills_id=skills_id))
+    async def queue_skills(self: Fieldset, skills_id: QueueSkillsType, timeout: float | None = None) -> APIResult:
+        return await self.send(QueueSkills(skills_id=skills_id), timeout)
 
-    async def set_audience_display(self: Fieldset, display: AudienceDisplay) -> APIResult:
-        return await self.send(SetAudienceDisplay(display=display))
\ No newline at end of file
+    async def set_audience_display(self: Fieldset, display: AudienceDisplay, timeout: float | None = None) -> APIResult:
+        return await self.send(SetAudienceDisplay(display=display), timeout)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import asyncio
+import inspect
+import random
+import weakref
+from typing import AsyncIterator
+
+from Dispatcher import Subscription, ANY
+from Fieldset import Fieldset
+from Types import (
+    APIResult, APISuccess, APIFailure, TMError, Field, FieldsetEvent, FieldsetState, ConnectionStats, ReconnectArgs,
+    numeric, generic_to_string
+)
+
+# (fieldset id, event, state of that fieldset right after the event)
+ManagedEvent = tuple[numeric, FieldsetEvent, FieldsetState]
+
+
+class FieldsetManager:
+    """Discovers every fieldset of a Client, connects them all at once and keeps them alive.
+
+    Events of every fieldset come out of one async iterator, events(). The Client may be a Client or
+    an AsyncClient, REST calls of a plain Client are run in a thread to keep the event loop free.
+    With supervise, a fieldset that cannot be reached at startup is retried with the backoff of
+    ClientArgs.reconnect_args until it connects or stop() is called."""
+
+    def __init__(self: FieldsetManager, client, supervise: bool = True):
+        self.client = client  # Of type Client or AsyncClient, not imported to prevent circular imports
+        self.is_async: bool = inspect.iscoroutinefunction(client.get)
+        self.supervise: bool = supervise
+        self.fieldsets: dict[numeric, Fieldset] = dict()
+        self.fields: dict[numeric, list[Field]] = dict()
+        # Result of each fieldset's connect(), failures included
+        self.connections: dict[numeric, APIResult] = dict()
+        self.listeners: dict[numeric, Subscription] = dict()
+        # Fieldsets whose first handshake failed, being retried
+        self.retries: dict[numeric, asyncio.Task] = dict()
+        # None tells an events() iterator to finish
+        self.subscribers: list[asyncio.Queue[ManagedEvent | None]] = []
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["client", "listeners", "retries", "subscribers"])
+
+    async def __aenter__(self: FieldsetManager) -> FieldsetManager:
+        await self.start()
+        return self
+
+    async def __aexit__(self: FieldsetManager, *exc_info) -> None:
+        await self.stop()
+        return None
+
+    async def call(self: FieldsetManager, sync, async_) -> APIResult:
+        return await async_() if self.is_async else await asyncio.to_thread(sync)
+
+    async def start(self: FieldsetManager) -> APIResult:
+        """Connects every fieldset concurrently, so startup takes about one handshake however many there are.
+
+        Fails only if the fieldsets cannot be listed, see connections for the outcome of each fieldset."""
+        # One bearer for every handshake, instead of each connect racing to refresh it
+        if not (rs:=await asyncio.to_thread(self.client.bearer.ensure)).success:
+            return APIFailure(error=rs.error, error_details=rs.error_details)
+        if not (rs:=await self.call(self.client.get_fieldsets, self.client.get_fieldsets)).success:
+            return rs
+
+        fieldsets: list[Fieldset] = rs.data
+        await asyncio.gather(*[self.start_fieldset(fs) for fs in fieldsets])
+        return APISuccess[dict[numeric, Fieldset]](data=self.fieldsets, cached=rs.cached)
+
+    async def start_fieldset(self: FieldsetManager, fieldset: Fieldset) -> None:
+        self.fieldsets[fieldset.id] = fieldset
+        self.listeners[fieldset.id] = fieldset.on_event(ANY, lambda event: self.publish(fieldset, event))
+
+        fields_rs, connect_rs = await asyncio.gather(
+            self.call(fieldset.get_fields, fieldset.get_fields_async),
+            self.connect_fieldset(fieldset),
+            return_exceptions=True
+        )
+        if not isinstance(fields_rs, BaseException) and fields_rs.success:
+            self.fields[fieldset.id] = fields_rs.data
+        self.connections[fieldset.id] = connect_rs
+        # An invalid URL will not get any better
+        if self.supervise and not connect_rs.success and connect_rs.error != TMError.WebSocketInvalidURL:
+            self.retries[fieldset.id] = asyncio.create_task(self.retry_fieldset(fieldset))
+        return None
+
+    async def connect_fieldset(self: FieldsetManager, fieldset: Fieldset) -> APIResult:
+        try:
+            return await fieldset.connect(self.supervise)
+        except Exception as e:
+            # connect() only turns some handshake errors into an APIFailure
+            return APIFailure(error=TMError.WebSocketError, error_details=e)
+
+    async def retry_fieldset(self: FieldsetManager, fieldset: Fieldset) -> None:
+        # The same backoff Fieldset.supervise_loop reconnects a dropped socket with
+        args: ReconnectArgs = self.client.connection_args.reconnect_args
+        delay: float = args.initial_delay
+        try:
+            while not self.connections[fieldset.id].success:
+                await asyncio.sleep(delay * random.uniform(1 - args.jitter, 1 + args.jitter))
+                fieldset.stats.reconnect_attempts += 1
+                self.connections[fieldset.id] = await self.connect_fieldset(fieldset)
+                delay = min(args.max_delay, delay * args.multiplier)
+        finally:
+            self.retries.pop(fieldset.id, None)
+        return None
+
+    def publish(self: FieldsetManager, fieldset: Fieldset, event: FieldsetEvent) -> None:
+        # The state is copied, the fieldset keeps updating its own while the event waits in a queue
+        item: ManagedEvent = (fieldset.id, event, fieldset.state.model_copy(deep=True))
+        for queue in self.subscribers:
+            # A full subscriber misses this event rather than holding back every fieldset
+            if not queue.full():
+                queue.put_nowait(item)
+        return None
+
+    def events(self: FieldsetManager, maxsize: int = 0) -> AsyncIterator[ManagedEvent]:
+        """Events of every fieldset as (fieldset id, event, state), until stop() is called.
+
+        The subscription starts when events() is called, not on the first iteration, and ends when the
+        iterator finishes, is closed or is garbage collected."""
+        queue: asyncio.Queue[ManagedEvent | None] = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        iterator: AsyncIterator[ManagedEvent] = self.drain(queue)
+        # An iterator that is never started never runs drain's finally
+        weakref.finalize(iterator, self.unsubscribe, queue)
+        return iterator
+
+    async def drain(self: FieldsetManager, queue: asyncio.Queue[ManagedEvent | None]) -> AsyncIterator[ManagedEvent]:
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+        finally:
+            self.unsubscribe(queue)
+
+    def unsubscribe(self: FieldsetManager, queue: asyncio.Queue[ManagedEvent | None]) -> None:
+        # Both drain's finally and the finalizer may get here
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+        return None
+
+    async def stop(self: FieldsetManager) -> None:
+        retries: list[asyncio.Task] = list(self.retries.values())
+        for task in retries:
+            task.cancel()
+        await asyncio.gather(*retries, return_exceptions=True)
+        for fieldset_id, listener in self.listeners.items():
+            self.fieldsets[fieldset_id].remove_listener(ANY, listener)
+        self.listeners.clear()
+        await asyncio.gather(*[fs.disconnect() for fs in self.fieldsets.values()], return_exceptions=True)
+        for queue in self.subscribers:
+            # The end of the stream must get through even to a full queue
+            while queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        return None
+
+    @property
+    def stats(self: FieldsetManager) -> dict[numeric, ConnectionStats]:
+        return {fieldset_id: fs.stats for fieldset_id, fs in self.fieldsets.items()}
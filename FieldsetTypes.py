@@ -0,0 +1,145 @@
+from abc import ABC
+from typing import Union
+
+from pydantic import BaseModel, Field as PydanticField, computed_field
+
+from RecordTypes import MatchTuple
+from Types import AudienceDisplay, QueueSkillsType, ActiveMatchType, QueueState, FieldID, numeric, generic_to_string
+
+# Fieldset events, commands and state. Built the first time one is imported, usually through Types
+
+class FieldsetEvent(BaseModel, ABC):
+    # Set by the Fieldset that received the event
+    fieldset_id: numeric | None = None
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class FieldMatchAssigned(FieldsetEvent):
+    @computed_field
+    @property
+    def type(self) -> str: return "fieldMatchAssigned"
+    field_id: FieldID | None
+    match: MatchTuple | None
+
+class FieldActivated(FieldsetEvent):
+    @computed_field
+    @property
+    def type(self) -> str: return "fieldActivated"
+    field_id: FieldID | None
+
+class MatchStarted(FieldsetEvent):
+    @computed_field
+    @property
+    def type(self) -> str: return "matchStarted"
+    field_id: FieldID | None
+
+class MatchStopped(FieldsetEvent):
+    @computed_field
+    @property
+    def type(self) -> str: return "matchStopped"
+    field_id: FieldID | None
+
+class AudienceDisplayChanged(FieldsetEvent):
+    @computed_field
+    @property
+    def type(self) -> str: return "audienceDisplayChanged"
+    display: AudienceDisplay | None
+
+# Commands are sent with model_dump_json(by_alias=True), the aliases are Tournament Manager's names
+
+class FieldsetCommand(BaseModel, ABC):
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class StartMatch(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "start"
+    field_id: numeric = PydanticField(serialization_alias="fieldID")
+
+class EndMatchEarly(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "endEarly"
+    field_id: numeric = PydanticField(serialization_alias="fieldID")
+
+class AbortMatch(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "abort"
+    field_id: numeric = PydanticField(serialization_alias="fieldID")
+
+class ResetTimer(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "reset"
+    field_id: numeric = PydanticField(serialization_alias="fieldID")
+
+class QueuePreviousMatch(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "queuePrevMatch"
+
+class QueueNextMatch(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "queueNextMatch"
+
+class QueueSkills(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "queueSkills"
+    skills_id: QueueSkillsType = PydanticField(serialization_alias="skillsID")
+
+class SetAudienceDisplay(FieldsetCommand):
+    @computed_field
+    @property
+    def cmd(self) -> str: return "setAudienceDisplay"
+    display: AudienceDisplay
+
+class FieldsetMatchActiveNone(BaseModel):
+    @computed_field
+    @property
+    def type(self) -> ActiveMatchType: return ActiveMatchType.NONE
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class FieldsetMatchActiveTimeout(BaseModel):
+    @computed_field
+    @property
+    def type(self) -> ActiveMatchType: return ActiveMatchType.Timeout
+    state: QueueState
+    field_id: numeric
+    active: bool
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class FieldsetMatchActiveMatch(BaseModel):
+    @computed_field
+    @property
+    def type(self) -> ActiveMatchType: return ActiveMatchType.Match
+    state: QueueState
+    match: MatchTuple
+    field_id: numeric
+    active: bool
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+FieldsetMatch = Union[
+    FieldsetMatchActiveNone,
+    FieldsetMatchActiveTimeout,
+    FieldsetMatchActiveMatch
+]
+
+class FieldsetState(BaseModel):
+    match: FieldsetMatch
+    audience_display: AudienceDisplay
+    # True while the fieldset websocket is down and the state may be out of date
+    stale: bool = False
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
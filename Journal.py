@@ -0,0 +1,187 @@
+import asyncio
+import datetime
+import json
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Iterator, NamedTuple
+from urllib.parse import urlsplit
+
+from Fieldset import Fieldset
+from Types import APIResult, EndpointCacheMember, FieldsetData, ReplayStats, numeric, generic_to_string
+
+# A journal is MAGIC followed by records. Each record is HEADER, then a JSON meta part, then the raw payload:
+#   kind      1 byte, one of the kinds below
+#   time      float64 seconds on the monotonic clock since the recorder started
+#   meta      uint16 length, JSON
+#   payload   uint32 length, the websocket frame or the response body exactly as received
+MAGIC: bytes = b"TMJOURNAL1\n"
+HEADER: struct.Struct = struct.Struct("<BdHI")
+
+# Written whenever a recorder opens the journal, the monotonic clock starts over from there
+SESSION: int = 0
+# meta is the fieldset id
+FRAME: int = 1
+# meta is [url, status code, Last-Modified header or null]
+RESPONSE: int = 2
+
+
+class JournalRecord(NamedTuple):
+    kind: int
+    time: float
+    meta: Any
+    payload: bytes
+
+
+class JournalRecorder:
+    """Appends websocket frames and REST responses to a journal file.
+
+    Set ClientArgs.journal_path to record everything a Client sees, records from
+    several threads are serialized by a lock."""
+
+    def __init__(self: JournalRecorder, path: str):
+        self.path: str = path
+        self.lock: threading.Lock = threading.Lock()
+        self.file: BinaryIO = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.started: float = time.monotonic()
+        self.write(SESSION, datetime.datetime.now(datetime.UTC).isoformat(), b"")
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["lock", "file"])
+
+    def write(self: JournalRecorder, kind: int, meta: Any, payload: bytes) -> None:
+        meta_bytes: bytes = json.dumps(meta, separators=(",", ":")).encode("UTF-8")
+        with self.lock:
+            if self.file.closed:
+                return None
+            self.file.write(HEADER.pack(kind, time.monotonic() - self.started, len(meta_bytes), len(payload)))
+            self.file.write(meta_bytes)
+            self.file.write(payload)
+        return None
+
+    def record_frame(self: JournalRecorder, fieldset_id: numeric, frame: str | bytes) -> None:
+        self.write(FRAME, fieldset_id, frame.encode("UTF-8") if isinstance(frame, str) else frame)
+        return None
+
+    def record_response(self: JournalRecorder, url: str, response: Any) -> None:
+        # response is a requests.Response or an httpx.Response
+        meta: list = [url, response.status_code, response.headers.get("Last-Modified")]
+        self.write(RESPONSE, meta, response.content)
+        return None
+
+    def flush(self: JournalRecorder) -> None:
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+        return None
+
+    def close(self: JournalRecorder) -> None:
+        with self.lock:
+            self.file.close()
+        return None
+
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """Records in the order they were written, with times made continuous across recorder sessions.
+
+    A journal cut short by a crash ends at its last complete record."""
+    with open(path, "rb") as fin:
+        if fin.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a journal")
+        # Each session restarts the monotonic clock, continue from the last time of the previous one
+        offset: float = 0.0
+        last: float = 0.0
+        while len(header := fin.read(HEADER.size)) == HEADER.size:
+            kind, t, meta_length, payload_length = HEADER.unpack(header)
+            meta: bytes = fin.read(meta_length)
+            payload: bytes = fin.read(payload_length)
+            if len(meta) != meta_length or len(payload) != payload_length:
+                break
+            if kind == SESSION:
+                offset = last
+            last = offset + t
+            yield JournalRecord(kind, last, json.loads(meta), payload)
+
+
+class RecordedResponse:
+    # Just the members of requests.Response that Client.handle_response reads
+    def __init__(self: RecordedResponse, status_code: int, last_modified: str | None, content: bytes):
+        self.status_code: int = status_code
+        self.headers: dict[str, str] = {"Last-Modified": last_modified} if last_modified is not None else {}
+        self.content: bytes = content
+
+
+class JournalReplayer:
+    """Feeds a journal back through the same path as live traffic.
+
+    Frames go through Fieldset.handle_frame, decoding them, updating the fieldset state and dispatching
+    to its listeners and the global ones. With a client, responses go through Client.handle_response,
+    which refills its endpoint cache, and the results are passed to on_response. A client that
+    has a journal of its own records the replayed responses into it as well.
+    Subscribe to the fieldsets after load() and before replay()."""
+
+    def __init__(self: JournalReplayer, path: str, client=None, fieldsets: dict[numeric, Fieldset] | None = None):
+        self.path: str = path
+        self.client = client  # Of type Client, not imported to prevent circular imports
+        # Pass the Fieldsets of a FieldsetManager to replay into existing listeners
+        self.fieldsets: dict[numeric, Fieldset] = fieldsets if fieldsets is not None else dict()
+        self.records: list[JournalRecord] = []
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["client", "records"])
+
+    def load(self: JournalReplayer) -> dict[numeric, Fieldset]:
+        self.records = list(read_journal(self.path))
+        for record in self.records:
+            if record.kind == FRAME and record.meta not in self.fieldsets:
+                data: FieldsetData = FieldsetData(id=record.meta, name=f"Replay {record.meta}")
+                self.fieldsets[record.meta] = Fieldset(self.client, data)
+        return self.fieldsets
+
+    async def replay(
+            self: JournalReplayer,
+            speed: float | None = 1.0,
+            on_response: Callable[[str, APIResult], Any] | None = None
+    ) -> ReplayStats:
+        """speed 1.0 keeps the recorded timing, 10.0 replays ten times faster and None as fast as possible."""
+        if not self.records:
+            self.load()
+        stats: ReplayStats = ReplayStats()
+        started: float = time.monotonic()
+        first: float | None = None
+        for record in self.records:
+            if record.kind == SESSION:
+                continue
+            if first is None:
+                first = record.time
+            if speed is not None:
+                if (delay := started + (record.time - first) / speed - time.monotonic()) > 0:
+                    await asyncio.sleep(delay)
+            elif stats.records % 64 == 0:
+                # Let queued Async and Thread handlers run now and then, as a live socket would
+                await asyncio.sleep(0)
+            stats.records += 1
+            if record.kind == FRAME:
+                stats.frames += 1
+                await self.fieldsets[record.meta].handle_frame(record.payload)
+            elif record.kind == RESPONSE:
+                stats.responses += 1
+                if self.client is not None:
+                    self.replay_response(record, on_response)
+            stats.journal_time = record.time - first
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def replay_response(
+            self: JournalReplayer,
+            record: JournalRecord,
+            on_response: Callable[[str, APIResult], Any] | None
+    ) -> None:
+        url, status_code, last_modified = record.meta
+        cached: EndpointCacheMember | None = self.client.endpoint_cache.lookup(url)
+        rs: APIResult = self.client.handle_response(url, RecordedResponse(status_code, last_modified, record.payload), cached)
+        if on_response is not None:
+            on_response(urlsplit(url).path, rs)
+        return None
@@ -0,0 +1,273 @@
+import bisect
+import json
+import math
+import re
+import threading
+from functools import lru_cache
+from typing import Any
+
+from Types import generic_to_string
+
+# Metrics are off by default. Instrumented code checks registry.enabled before doing any work,
+# so a disabled registry costs one attribute lookup per call site.
+
+# Seconds, from sub-millisecond cache hits up to slow bearer fetches
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    kind: str = "untyped"
+
+    def __init__(self: Metric, name: str, description: str, label_names: tuple[str, ...] = ()):
+        self.name: str = name
+        self.description: str = description
+        self.label_names: tuple[str, ...] = label_names
+        self.lock: threading.Lock = threading.Lock()
+        # Label values, in label_names order -> value
+        self.values: dict[tuple[str, ...], Any] = dict()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["lock"])
+
+    def label_text(self: Metric, labels: tuple[str, ...], extra: str = "") -> str:
+        pairs: list[str] = [f'{n}="{escape(v)}"' for n, v in zip(self.label_names, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self: Metric) -> list[str]:
+        with self.lock:
+            return [f"{self.name}{self.label_text(labels)} {value}" for labels, value in self.values.items()]
+
+    def snapshot(self: Metric) -> list[dict[str, Any]]:
+        with self.lock:
+            return [
+                {"labels": dict(zip(self.label_names, labels)), "value": value}
+                for labels, value in self.values.items()
+            ]
+
+    def clear(self: Metric) -> None:
+        with self.lock:
+            self.values.clear()
+        return None
+
+
+class Counter(Metric):
+    kind: str = "counter"
+
+    def inc(self: Counter, *labels: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+        return None
+
+
+class Gauge(Metric):
+    kind: str = "gauge"
+
+    def set(self: Gauge, value: float, *labels: str) -> None:
+        with self.lock:
+            self.values[labels] = value
+        return None
+
+    def inc(self: Gauge, *labels: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+        return None
+
+
+class Histogram(Metric):
+    kind: str = "histogram"
+
+    def __init__(
+            self: Histogram,
+            name: str,
+            description: str,
+            label_names: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+
+    def observe(self: Histogram, value: float, *labels: str) -> None:
+        # Per bucket counts, not cumulative, plus one overflow bucket; summed up on export
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            if (state := self.values.get(labels)) is None:
+                # [bucket counts, sum, count]
+                state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+        return None
+
+    def samples(self: Histogram) -> list[str]:
+        lines: list[str] = []
+        with self.lock:
+            for labels, (counts, total, count) in self.values.items():
+                cumulative: int = 0
+                for bound, bucket in zip((*self.buckets, math.inf), counts):
+                    cumulative += bucket
+                    le: str = 'le="+Inf"' if bound == math.inf else f'le="{bound!r}"'
+                    lines.append(f"{self.name}_bucket{self.label_text(labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{self.label_text(labels)} {total}")
+                lines.append(f"{self.name}_count{self.label_text(labels)} {count}")
+        return lines
+
+    def snapshot(self: Histogram) -> list[dict[str, Any]]:
+        with self.lock:
+            return [{
+                "labels": dict(zip(self.label_names, labels)),
+                "buckets": dict(zip([*map(repr, self.buckets), "+Inf"], counts)),
+                "sum": total,
+                "count": count
+            } for labels, (counts, total, count) in self.values.items()]
+
+
+class MetricsRegistry:
+    """In-process metrics, exported as Prometheus text or JSON.
+
+    Asking for a metric that already exists returns it, so modules can declare what they use."""
+
+    def __init__(self: MetricsRegistry, enabled: bool = False):
+        self.enabled: bool = enabled
+        self.metrics: dict[str, Metric] = dict()
+        self.lock: threading.Lock = threading.Lock()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["lock"])
+
+    def register[M: Metric](self: MetricsRegistry, metric: M) -> M:
+        with self.lock:
+            if (existing := self.metrics.get(metric.name)) is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"{metric.name} is already registered as a different metric")
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self: MetricsRegistry, name: str, description: str, label_names: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, description, label_names))
+
+    def gauge(self: MetricsRegistry, name: str, description: str, label_names: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, description, label_names))
+
+    def histogram(
+            self: MetricsRegistry,
+            name: str,
+            description: str,
+            label_names: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, description, label_names, buckets))
+
+    def snapshot(self: MetricsRegistry) -> dict[str, Any]:
+        return {
+            name: {"type": metric.kind, "help": metric.description, "samples": metric.snapshot()}
+            for name, metric in list(self.metrics.items())
+        }
+
+    def to_json(self: MetricsRegistry) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self: MetricsRegistry) -> str:
+        # Text exposition format 0.0.4
+        lines: list[str] = []
+        for name, metric in list(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def reset(self: MetricsRegistry) -> None:
+        for metric in list(self.metrics.values()):
+            metric.clear()
+        return None
+
+
+registry: MetricsRegistry = MetricsRegistry()
+
+
+def enable() -> None:
+    registry.enabled = True
+    return None
+
+
+def disable() -> None:
+    registry.enabled = False
+    return None
+
+
+# What the client records, see the observe_ functions below for the REST, bearer and command parts
+
+request_seconds: Histogram = registry.histogram(
+    "tm_request_seconds", "REST request latency, including bearer checks and decoding", ("endpoint",)
+)
+requests_total: Counter = registry.counter(
+    "tm_requests_total", "REST responses by status code, error when no response arrived", ("endpoint", "status")
+)
+requests_cached: Counter = registry.counter(
+    "tm_requests_cached_total", "REST requests answered from the endpoint cache after a 304", ("endpoint",)
+)
+bearer_refreshes: Counter = registry.counter(
+    "tm_bearer_refreshes_total", "Bearer updates, by whether the token was fetched, taken from the store or failed",
+    ("outcome",)
+)
+bearer_refresh_seconds: Histogram = registry.histogram(
+    "tm_bearer_refresh_seconds", "Time taken by a bearer update, including waiting for the store lock"
+)
+fieldset_messages: Counter = registry.counter(
+    "tm_fieldset_messages_total", "Websocket messages received", ("fieldset",)
+)
+fieldset_decode_seconds: Histogram = registry.histogram(
+    "tm_fieldset_decode_seconds", "Time to decode a websocket message into an event", ("fieldset",)
+)
+fieldset_handler_seconds: Histogram = registry.histogram(
+    "tm_fieldset_handler_seconds", "Time to update the fieldset state and dispatch an event to its handlers", ("fieldset",)
+)
+fieldset_reconnects: Counter = registry.counter(
+    "tm_fieldset_reconnects_total", "Websocket connections re-established after a drop", ("fieldset",)
+)
+fieldset_connected: Gauge = registry.gauge(
+    "tm_fieldset_connected", "1 while the fieldset websocket is connected", ("fieldset",)
+)
+fieldset_commands: Counter = registry.counter(
+    "tm_fieldset_commands_total", "Fieldset commands by outcome: confirmed, sent without confirmation, timeout or failed",
+    ("fieldset", "cmd", "outcome")
+)
+fieldset_command_seconds: Histogram = registry.histogram(
+    "tm_fieldset_command_seconds", "Time from sending a fieldset command to the event confirming it", ("fieldset", "cmd")
+)
+
+
+@lru_cache(maxsize=256)
+def endpoint(path: str) -> str:
+    # Ids are folded so every division or fieldset shares one label value: /api/matches/{id}
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path.partition("?")[0])
+
+
+def observe_request(path: str, status: int | str, cached: bool, seconds: float) -> None:
+    label: str = endpoint(path)
+    request_seconds.observe(seconds, label)
+    requests_total.inc(label, str(status))
+    if cached:
+        requests_cached.inc(label)
+    return None
+
+
+def observe_bearer_refresh(outcome: str, seconds: float) -> None:
+    bearer_refreshes.inc(outcome)
+    bearer_refresh_seconds.observe(seconds)
+    return None
+
+
+def observe_command(fieldset: str, cmd: str, outcome: str, seconds: float) -> None:
+    fieldset_commands.inc(fieldset, cmd, outcome)
+    if outcome == "confirmed":
+        fieldset_command_seconds.observe(seconds, fieldset, cmd)
+    return None
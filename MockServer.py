@@ -0,0 +1,592 @@
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
+import random
+import re
+import secrets
+import sys
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import websockets
+from websockets.asyncio.server import Server, ServerConnection
+from websockets.datastructures import Headers
+from websockets.http11 import Request, Response
+
+from RFC1123_Date import RFC1123Date
+from Types import (
+    AuthorizationArgs, ClientArgs, MockServerArgs, MockServerStats, RemoteAuthorizationArgs, generic_to_string
+)
+
+# Run from the repository root, e.g. `python MockServer.py 8080`, to serve until interrupted.
+
+FIELDSET_SOCKET: re.Pattern = re.compile(r"/api/fieldsets/(\d+)")
+
+
+class MockTournament:
+    """Synthetic event data, served as pre-encoded JSON bodies with a Last-Modified per path."""
+
+    def __init__(self: MockTournament, args: MockServerArgs):
+        self.args: MockServerArgs = args
+        # path -> (body, Last-Modified truncated to the second, as the header carries it)
+        self.bodies: dict[str, tuple[bytes, datetime.datetime]] = dict()
+        self.teams: dict[int, list[dict[str, Any]]] = dict()
+        self.matches: dict[int, list[dict[str, Any]]] = dict()
+        self.fields: dict[int, list[dict[str, Any]]] = dict()
+        self.lock: threading.Lock = threading.Lock()
+
+        divisions: list[dict[str, Any]] = [{"id": d, "name": f"Division {d}"} for d in range(1, args.divisions + 1)]
+        fieldsets: list[dict[str, Any]] = [{"id": f, "name": f"Fieldset {f}"} for f in range(1, args.fieldsets + 1)]
+        self.set("/api/event", {"event": {"code": "RE-MOCK-26-0001", "name": "Mock Tournament"}})
+        self.set("/api/divisions", {"divisions": divisions})
+        self.set("/api/fieldsets", {"fieldSets": fieldsets})
+        for f in fieldsets:
+            first: int = (f["id"] - 1) * args.fields_per_fieldset + 1
+            self.fields[f["id"]] = [
+                {"id": i, "name": f"Field {i}"} for i in range(first, first + args.fields_per_fieldset)
+            ]
+            self.set(f"/api/fieldsets/{f['id']}/fields", {"fields": self.fields[f["id"]]})
+        for d in divisions:
+            self.teams[d["id"]] = self.make_teams(d["id"])
+            self.matches[d["id"]] = self.make_matches(d["id"])
+            self.set(f"/api/teams/{d['id']}", {"teams": self.teams[d["id"]]})
+        self.set("/api/teams", {"teams": [t for teams in self.teams.values() for t in teams]})
+        self.publish_results()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["bodies", "teams", "matches", "lock"])
+
+    def set(self: MockTournament, path: str, data: Any) -> None:
+        now: datetime.datetime = datetime.datetime.now(datetime.UTC).replace(microsecond=0, tzinfo=None)
+        with self.lock:
+            if (previous := self.bodies.get(path)) is not None:
+                # One second apart at least, or a client holding the old date would be told nothing changed
+                now = max(now, previous[1] + datetime.timedelta(seconds=1))
+            self.bodies[path] = (json.dumps(data, separators=(",", ":")).encode("UTF-8"), now)
+        return None
+
+    def get(self: MockTournament, path: str) -> tuple[bytes, datetime.datetime] | None:
+        with self.lock:
+            return self.bodies.get(path)
+
+    def make_teams(self: MockTournament, division: int) -> list[dict[str, Any]]:
+        teams: list[dict[str, Any]] = []
+        for i in range(self.args.teams_per_division):
+            number: str = f"{division}{i + 100}{'ABCD'[i % 4]}"
+            teams.append({
+                "number": number,
+                "name": f"Mock Robotics {number}",
+                "city": "Springfield",
+                "state": "Mock State",
+                "country": "United States",
+                "age_group": "HIGH_SCHOOL",
+                "div_id": division,
+                "checked_in": True,
+                "short_name": number,
+                "sponsors": ""
+            })
+        return teams
+
+    def make_matches(self: MockTournament, division: int) -> list[dict[str, Any]]:
+        numbers: list[str] = [t["number"] for t in self.teams[division]]
+        start: datetime.datetime = datetime.datetime.now(datetime.UTC).replace(microsecond=0)
+        matches: list[dict[str, Any]] = []
+        for i in range(self.args.matches_per_division):
+            teams: list[str] = [numbers[(i * 4 + k * 7) % len(numbers)] for k in range(4)]
+            matches.append({
+                "winning_alliance": 0,
+                "finalScore": [0, 0],
+                "state": "UNPLAYED",
+                "match_info": {
+                    "time_scheduled": (start + datetime.timedelta(minutes=4 * i)).isoformat(),
+                    "state": "UNPLAYED",
+                    "alliances": [
+                        {"teams": [{"number": teams[0]}, {"number": teams[1]}]},
+                        {"teams": [{"number": teams[2]}, {"number": teams[3]}]}
+                    ],
+                    "match_tuple": {"session": 0, "division": division, "round": "QUAL", "instance": 1, "match": i + 1}
+                }
+            })
+        return matches
+
+    def score_next(self: MockTournament) -> None:
+        for division, matches in self.matches.items():
+            if (match := next((m for m in matches if m["state"] == "UNPLAYED"), None)) is None:
+                continue
+            red, blue = random.randint(0, 180), random.randint(0, 180)
+            match["finalScore"] = [red, blue]
+            match["winning_alliance"] = 1 if red > blue else 2 if blue > red else 0
+            match["state"] = match["match_info"]["state"] = "SCORED"
+        self.publish_results()
+        return None
+
+    def publish_results(self: MockTournament) -> None:
+        # Matches, rankings and skills all follow from the scored matches
+        for division, matches in self.matches.items():
+            self.set(f"/api/matches/{division}", {"matches": matches})
+            self.set(f"/api/rankings/{division}/QUAL", {"rankings": self.rank(division)})
+        self.set("/api/skills", {"skillsRankings": self.skills()})
+        return None
+
+    def rank(self: MockTournament, division: int) -> list[dict[str, Any]]:
+        records: dict[str, dict[str, int]] = {
+            t["number"]: {"wins": 0, "losses": 0, "ties": 0, "points": 0, "high": 0, "played": 0}
+            for t in self.teams[division]
+        }
+        for match in self.matches[division]:
+            if match["state"] != "SCORED":
+                continue
+            for side, alliance in enumerate(match["match_info"]["alliances"]):
+                score: int = match["finalScore"][side]
+                for team in alliance["teams"]:
+                    record: dict[str, int] = records[team["number"]]
+                    record["played"] += 1
+                    record["points"] += score
+                    record["high"] = max(record["high"], score)
+                    if match["winning_alliance"] == 0:
+                        record["ties"] += 1
+                    elif match["winning_alliance"] == side + 1:
+                        record["wins"] += 1
+                    else:
+                        record["losses"] += 1
+        order: list[str] = sorted(
+            records, key=lambda n: (-(2 * records[n]["wins"] + records[n]["ties"]), -records[n]["points"], n)
+        )
+        return [{
+            "rank": rank,
+            "tied": False,
+            "alliance": [{"name": number, "teams": [{"number": number}]}],
+            "wins": (r := records[number])["wins"],
+            "losses": r["losses"],
+            "ties": r["ties"],
+            "wp": 2 * r["wins"] + r["ties"],
+            "ap": 0,
+            "sp": r["points"],
+            "avg_points": r["points"] / r["played"] if r["played"] else 0,
+            "total_points": r["points"],
+            "high_score": r["high"],
+            "num_matches": r["played"],
+            "min_num_matches": r["played"] > 0
+        } for rank, number in enumerate(order, 1)]
+
+    def skills(self: MockTournament) -> list[dict[str, Any]]:
+        teams: list[dict[str, Any]] = [t for teams in self.teams.values() for t in teams]
+        # Stable per team, so skills only change when a team is added
+        scores: list[tuple[str, int, int]] = [
+            (t["number"], sum(map(ord, t["number"])) % 60, sum(map(ord, t["number"][::-1])) % 80) for t in teams
+        ]
+        scores.sort(key=lambda s: (-(s[1] + s[2]), s[0]))
+        return [{
+            "rank": rank,
+            "tie": False,
+            "number": number,
+            "totalScore": prog + driver,
+            "progHighScore": prog,
+            "progAttempts": 1,
+            "driverHighScore": driver,
+            "driverAttempts": 1
+        } for rank, (number, prog, driver) in enumerate(scores, 1)]
+
+
+class MockFieldset:
+    """Queue state of one fieldset, shared by its synthetic event cycle and the commands it receives."""
+
+    def __init__(self: MockFieldset, fieldset_id: int, fields: list[int], tournament: MockTournament):
+        self.id: int = fieldset_id
+        self.fields: list[int] = fields
+        self.tournament: MockTournament = tournament
+        self.sockets: set[ServerConnection] = set()
+        self.match_index: int = -1
+        self.field_index: int = -1
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["tournament", "sockets"])
+
+    @property
+    def field_id(self: MockFieldset) -> int | None:
+        return self.fields[self.field_index] if self.field_index >= 0 else None
+
+    def current_match(self: MockFieldset) -> dict[str, Any] | None:
+        if self.match_index < 0:
+            return None
+        # Fieldsets take turns through division 1's schedule
+        schedule: list[dict[str, Any]] = self.tournament.matches[1]
+        return schedule[self.match_index % len(schedule)]["match_info"]["match_tuple"]
+
+    def assigned(self: MockFieldset) -> dict[str, Any]:
+        return {"type": "fieldMatchAssigned", "fieldID": self.field_id, "match": self.current_match()}
+
+    def queue(self: MockFieldset, step: int) -> dict[str, Any]:
+        self.match_index = max(0, self.match_index + step)
+        self.field_index = (self.field_index + 1) % len(self.fields)
+        return self.assigned()
+
+    def command(self: MockFieldset, message: dict[str, Any]) -> dict[str, Any] | None:
+        # The event Tournament Manager answers a command with, if any
+        field_id: int | None = message.get("fieldID", self.field_id)
+        match message.get("cmd"):
+            case "start":
+                return {"type": "matchStarted", "fieldID": field_id}
+            case "endEarly" | "abort":
+                return {"type": "matchStopped", "fieldID": field_id}
+            case "queueNextMatch":
+                return self.queue(1)
+            case "queuePrevMatch":
+                return self.queue(-1)
+            case "queueSkills":
+                self.field_index = (self.field_index + 1) % len(self.fields)
+                # A skills match, its instance is the skills type asked for
+                skills: dict[str, Any] = {
+                    "session": 0, "division": 1, "round": "SKILLS", "instance": message.get("skillsID", 1), "match": 1
+                }
+                return {"type": "fieldMatchAssigned", "fieldID": self.field_id, "match": skills}
+            case "setAudienceDisplay":
+                return {"type": "audienceDisplayChanged", "display": message.get("display")}
+        return None
+
+    def cycle(self: MockFieldset) -> list[dict[str, Any]]:
+        # One synthetic match, each message sent 1 / event_rate seconds after the previous one
+        assigned: dict[str, Any] = self.queue(1)
+        return [
+            assigned,
+            {"type": "fieldActivated", "fieldID": self.field_id},
+            {"type": "matchStarted", "fieldID": self.field_id},
+            {"type": "matchStopped", "fieldID": self.field_id},
+            {"type": "audienceDisplayChanged", "display": "RESULTS"}
+        ]
+
+
+class AuthHandler(BaseHTTPRequestHandler):
+    # Stand-in for DWAB's OAuth token endpoint, set on a subclass per MockServer
+    server_owner: MockServer
+
+    def do_POST(self: AuthHandler) -> None:
+        owner: MockServer = self.server_owner
+        # Bearer sends the credentials as query parameters, a form body is accepted too
+        params: dict[str, list[str]] = parse_qs(urlsplit(self.path).query)
+        if length := int(self.headers.get("Content-Length", 0)):
+            params |= parse_qs(self.rfile.read(length).decode("UTF-8"))
+        credentials: tuple[str, str, str] = tuple(params.get(k, [""])[0] for k in ("client_id", "client_secret", "grant_type"))
+        if credentials != (owner.args.client_id, owner.args.client_secret, "client_credentials"):
+            self.reply(HTTPStatus.UNAUTHORIZED, {"error": "invalid_client"})
+            return None
+        token: str = secrets.token_hex(16)
+        owner.tokens.add(token)
+        owner.stats.tokens_issued += 1
+        self.reply(HTTPStatus.OK, {
+            "access_token": token,
+            "token_type": "Bearer",
+            "expires_in": int(owner.args.token_lifetime.total_seconds())
+        })
+        return None
+
+    def reply(self: AuthHandler, status: HTTPStatus, data: dict[str, Any]) -> None:
+        body: bytes = json.dumps(data).encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return None
+
+    def log_message(self: AuthHandler, format: str, *args: Any) -> None:
+        return None
+
+
+class MockServer:
+    """A local stand-in for Tournament Manager, for tests and benchmarks.
+
+    REST endpoints and the fieldset websockets share one port, as on a real Tournament Manager,
+    and the OAuth token endpoint runs on a second one. REST connections are kept alive between
+    requests, so a pooled client reuses them. Requests must carry a bearer issued here and
+    a valid x-tm-signature, If-Modified-Since is answered with 304 while the data is unchanged.
+    Latency, failures and the rate of synthetic events are set with MockServerArgs.
+
+        async with MockServer() as server:
+            client = AsyncClient(server.client_args(), MemoryTokenStore())
+    """
+
+    def __init__(self: MockServer, args: MockServerArgs = MockServerArgs()):
+        self.args: MockServerArgs = args
+        self.stats: MockServerStats = MockServerStats()
+        self.tournament: MockTournament = MockTournament(args)
+        self.fieldsets: dict[int, MockFieldset] = {
+            f: MockFieldset(f, [field["id"] for field in fields], self.tournament)
+            for f, fields in self.tournament.fields.items()
+        }
+        self.keyed: hmac.HMAC = hmac.new(args.client_api_key.encode("UTF-8"), digestmod=hashlib.sha256)
+        self.tokens: set[str] = set()
+        # Plain HTTP on the public port, websocket upgrades are piped through to socket_server
+        self.server: asyncio.Server | None = None
+        self.socket_server: Server | None = None
+        self.streams: set[asyncio.StreamWriter] = set()
+        self.auth_server: ThreadingHTTPServer | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(
+            *args, **kwargs,
+            ignored_fields=["tournament", "keyed", "tokens", "server", "socket_server", "streams", "auth_server", "tasks"]
+        )
+
+    async def __aenter__(self: MockServer) -> MockServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self: MockServer, *exc_info) -> None:
+        await self.stop()
+        return None
+
+    @property
+    def address(self: MockServer) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def auth_address(self: MockServer) -> str:
+        host, port = self.auth_server.server_address[:2]
+        return f"http://{host}:{port}/oauth2/token"
+
+    def client_args(self: MockServer, **kwargs: Any) -> ClientArgs:
+        # ClientArgs pointing at this server, kwargs override any other field
+        return ClientArgs(**{
+            "address": self.address,
+            "clientAPIKey": self.args.client_api_key,
+            "auth_address": self.auth_address,
+            "authorization_args": AuthorizationArgs(authorization=RemoteAuthorizationArgs(
+                client_id=self.args.client_id,
+                client_secret=self.args.client_secret,
+                expiration_date=datetime.datetime.now(datetime.UTC) + datetime.timedelta(days=365)
+            ))
+        } | kwargs)
+
+    async def start(self: MockServer) -> None:
+        handler: type[AuthHandler] = type("BoundAuthHandler", (AuthHandler,), {"server_owner": self})
+        self.auth_server = ThreadingHTTPServer((self.args.host, self.args.auth_port), handler)
+        self.auth_server.daemon_threads = True
+        threading.Thread(target=self.auth_server.serve_forever, name="mock-auth", daemon=True).start()
+
+        # The websockets server closes the connection after any response but a handshake, so it only
+        # takes the upgrades handle_http passes on and REST is answered in front of it, with keep-alive
+        self.socket_server = await websockets.serve(
+            self.handle_socket, self.args.host, 0, process_request=self.process_upgrade
+        )
+        self.server = await asyncio.start_server(self.handle_http, self.args.host, self.args.port)
+        if self.args.event_rate > 0:
+            for fieldset in self.fieldsets.values():
+                self.spawn(self.event_loop(fieldset))
+        if self.args.score_interval is not None:
+            self.spawn(self.score_loop())
+        return None
+
+    async def stop(self: MockServer) -> None:
+        for task in list(self.tasks):
+            task.cancel()
+        if self.socket_server is not None:
+            self.socket_server.close()
+            await self.socket_server.wait_closed()
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive connections would otherwise hold wait_closed up
+            for writer in list(self.streams):
+                writer.close()
+            await self.server.wait_closed()
+        if self.auth_server is not None:
+            # shutdown blocks until serve_forever notices, keep the loop free meanwhile
+            await asyncio.to_thread(self.auth_server.shutdown)
+            self.auth_server.server_close()
+        return None
+
+    def spawn(self: MockServer, coroutine) -> None:
+        task: asyncio.Task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return None
+
+    def verify(self: MockServer, request: Request) -> bool:
+        # Recomputes the signature the way Signer makes it
+        if not self.args.verify_signatures:
+            return True
+        authorization: str = request.headers.get("Authorization", "")
+        token: str = authorization.removeprefix("Bearer ")
+        if token not in self.tokens:
+            return False
+        target, _, query = request.path.partition("?")
+        string_to_sign: str = "\n".join([
+            "GET",
+            target + query,
+            f"token:{token}",
+            f"host:{request.headers.get('Host', '')}",
+            f"x-tm-date:{request.headers.get('x-tm-date', '')}"
+        ]) + "\n"
+        signature: hmac.HMAC = self.keyed.copy()
+        signature.update(string_to_sign.encode("UTF-8"))
+        return hmac.compare_digest(signature.hexdigest(), request.headers.get("x-tm-signature", ""))
+
+    @staticmethod
+    def respond(status: HTTPStatus, body: bytes = b"", last_modified: datetime.datetime | None = None) -> Response:
+        headers: Headers = Headers([
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body)))
+        ])
+        if last_modified is not None:
+            headers["Last-Modified"] = str(RFC1123Date(last_modified))
+        return Response(status.value, status.phrase, headers, body)
+
+    @staticmethod
+    async def read_request(reader: asyncio.StreamReader) -> tuple[bytes, str, Request] | None:
+        # The raw head, the method and the request, None once the client closes between requests
+        try:
+            head: bytes = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        request_line, *lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = request_line.split(" ", 2)
+        headers: Headers = Headers()
+        for line in lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip()] = value.strip()
+        if (length := int(headers.get("Content-Length", 0))) > 0:
+            # Nothing here reads request bodies, skip to the next request
+            await reader.readexactly(length)
+        return head, method, Request(path, headers)
+
+    async def handle_http(self: MockServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats.http_connections += 1
+        self.streams.add(writer)
+        try:
+            while (parsed := await self.read_request(reader)) is not None:
+                head, method, request = parsed
+                if request.headers.get("Upgrade", "").lower() == "websocket":
+                    await self.pipe_upgrade(head, reader, writer)
+                    break
+                response: Response = await self.process_request(method, request)
+                writer.write(response.serialize())
+                await writer.drain()
+                if request.headers.get("Connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError):
+            # Reset by the client, or a request that could not be parsed
+            pass
+        finally:
+            self.streams.discard(writer)
+            writer.close()
+        return None
+
+    async def pipe_upgrade(
+            self: MockServer,
+            head: bytes,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> None:
+        # Relays the connection to socket_server as it is, from the upgrade request on
+        host, port = self.socket_server.sockets[0].getsockname()[:2]
+        upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+        upstream_writer.write(head)
+
+        async def pipe(source: asyncio.StreamReader, sink: asyncio.StreamWriter) -> None:
+            try:
+                while data := await source.read(65536):
+                    sink.write(data)
+                    await sink.drain()
+            except ConnectionError:
+                pass
+            finally:
+                sink.close()
+
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+        return None
+
+    async def delay(self: MockServer) -> None:
+        if (seconds := self.args.latency + random.uniform(0, self.args.latency_jitter)) > 0:
+            await asyncio.sleep(seconds)
+        return None
+
+    async def process_upgrade(self: MockServer, connection: ServerConnection, request: Request) -> Response | None:
+        # Only the fieldset websockets go on to the handshake
+        await self.delay()
+        if not self.verify(request):
+            self.stats.unauthorized += 1
+            return self.respond(HTTPStatus.UNAUTHORIZED, b'{"error":"invalid signature"}')
+        socket: re.Match | None = FIELDSET_SOCKET.fullmatch(request.path.partition("?")[0])
+        return None if socket and int(socket.group(1)) in self.fieldsets else self.respond(HTTPStatus.NOT_FOUND)
+
+    async def process_request(self: MockServer, method: str, request: Request) -> Response:
+        await self.delay()
+        if not self.verify(request):
+            self.stats.unauthorized += 1
+            return self.respond(HTTPStatus.UNAUTHORIZED, b'{"error":"invalid signature"}')
+        if method != "GET":
+            return self.respond(HTTPStatus.METHOD_NOT_ALLOWED, b'{"error":"method not allowed"}')
+
+        path: str = request.path.partition("?")[0]
+        self.stats.requests += 1
+        if random.random() < self.args.failure_rate:
+            self.stats.injected_failures += 1
+            return self.respond(HTTPStatus(self.args.failure_status), b'{"error":"injected failure"}')
+        if (entry := self.tournament.get(path)) is None:
+            return self.respond(HTTPStatus.NOT_FOUND, b'{"error":"not found"}')
+
+        body, last_modified = entry
+        if (since := request.headers.get("If-Modified-Since")) is not None:
+            try:
+                if last_modified <= RFC1123Date(since).datetime_obj:
+                    self.stats.not_modified += 1
+                    return self.respond(HTTPStatus.NOT_MODIFIED, last_modified=last_modified)
+            except ValueError:
+                pass
+        return self.respond(HTTPStatus.OK, body, last_modified)
+
+    def send(self: MockServer, fieldset: MockFieldset, message: dict[str, Any]) -> None:
+        websockets.broadcast(fieldset.sockets, json.dumps(message))
+        self.stats.frames_sent += len(fieldset.sockets)
+        return None
+
+    async def handle_socket(self: MockServer, connection: ServerConnection) -> None:
+        fieldset: MockFieldset = self.fieldsets[int(FIELDSET_SOCKET.fullmatch(connection.request.path).group(1))]
+        self.stats.connections += 1
+        fieldset.sockets.add(connection)
+        try:
+            # Like Tournament Manager, tell a new connection what is currently queued
+            if fieldset.match_index >= 0:
+                await connection.send(json.dumps(fieldset.assigned()))
+                self.stats.frames_sent += 1
+            async for message in connection:
+                self.stats.commands += 1
+                try:
+                    command: dict[str, Any] = json.loads(message)
+                except ValueError:
+                    continue
+                if (reply := fieldset.command(command)) is not None:
+                    self.send(fieldset, reply)
+        finally:
+            fieldset.sockets.discard(connection)
+        return None
+
+    async def event_loop(self: MockServer, fieldset: MockFieldset) -> None:
+        while True:
+            for message in fieldset.cycle():
+                await asyncio.sleep(1 / self.args.event_rate)
+                self.send(fieldset, message)
+
+    async def score_loop(self: MockServer) -> None:
+        while True:
+            await asyncio.sleep(self.args.score_interval)
+            self.tournament.score_next()
+
+
+async def serve_forever(port: int) -> None:
+    async with MockServer(MockServerArgs(port=port)) as server:
+        print(server.args)
+        print(f"address: {server.address}\nauth_address: {server.auth_address}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve_forever(int(sys.argv[1]) if len(sys.argv) > 1 else 8080))
@@ -0,0 +1,96 @@
+import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+from Types import MatchRound, MatchState, AgeGroup, numeric, generic_to_string
+
+# Records served by the REST API. Built the first time one is imported, usually through Types
+
+class SkillsRanking(BaseModel):
+    rank: int
+    tie: bool
+    number: str
+    totalScore: int
+    progHighScore: int
+    progAttempts: int
+    driverHighScore: int
+    driverAttempts: int
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class _team(BaseModel):
+    number: str
+
+class MatchAlliance(BaseModel):
+    teams: list[_team]
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class MatchTuple(BaseModel):
+    session: int
+    division: int
+    round: MatchRound | int
+    instance: int
+    match: int
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class Match(BaseModel):
+    class MatchInfo(BaseModel):
+        time_scheduled: datetime.datetime
+        state: MatchState
+        alliances: list[MatchAlliance]
+        match_tuple: MatchTuple
+    winning_alliance: int
+    finalScore: list[int]
+    state: MatchState
+    match_info: MatchInfo
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class RankAlliance(BaseModel):
+    name: str
+    teams: list[_team]
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class Ranking(BaseModel):
+    rank: int
+    tied: Literal[False]
+    alliance: list[RankAlliance]
+    wins: int
+    losses: int
+    ties: int
+    wp: int
+    ap: int
+    sp: int
+    avg_points: numeric
+    total_points: int
+    high_score: int
+    num_matches: int
+    min_num_matches: bool
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class Team(BaseModel):
+    number: str
+    name: str
+    city: str
+    state: str
+    country: str
+    age_group: AgeGroup
+    div_id: int
+    checked_in: bool
+    # Deprecated
+    short_name: str
+    sponsors: str
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
@@ -0,0 +1,109 @@
+from collections.abc import Hashable, Sequence
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from Types import APIResult, APIFailure, TMError, ValidationMode, generic_to_string
+
+
+class LazyRecord:
+    """One raw JSON record that is validated into its model on first attribute access.
+
+    Item access (record["number"]) reads the raw JSON without validating."""
+    __slots__ = ("model", "raw", "instance")
+
+    def __init__(self: LazyRecord, model: type[BaseModel], raw: dict[str, Any]):
+        self.model: type[BaseModel] = model
+        self.raw: dict[str, Any] = raw
+        self.instance: BaseModel | None = None
+
+    def __str__(self: LazyRecord, indent="") -> str:
+        return generic_to_string(self.validate(), indent)
+
+    def __repr__(self: LazyRecord) -> str:
+        return f"LazyRecord[{self.model.__name__}]({self.raw!r})"
+
+    def __getattr__(self: LazyRecord, name: str) -> Any:
+        # Only reached for names that are not slots, guard against unset slots while copying
+        if name in LazyRecord.__slots__:
+            raise AttributeError(name)
+        return getattr(self.validate(), name)
+
+    def __getitem__(self: LazyRecord, key: str) -> Any:
+        return self.raw[key]
+
+    def validate(self: LazyRecord) -> BaseModel:
+        if (instance := self.instance) is None:
+            instance = self.instance = self.model.model_validate(self.raw)
+        return instance
+
+
+class LazyRecords(Sequence):
+    """A list of raw JSON records exposed as LazyRecords, built on first index."""
+
+    def __init__(self: LazyRecords, model: type[BaseModel], raw: list[dict[str, Any]]):
+        self.model: type[BaseModel] = model
+        self.raw: list[dict[str, Any]] = raw
+        self.records: list[LazyRecord | None] = [None] * len(raw)
+
+    def __str__(self: LazyRecords, indent="") -> str:
+        return f"LazyRecords[{self.model.__name__}]({len(self)} records)"
+
+    def __len__(self: LazyRecords) -> int:
+        return len(self.raw)
+
+    def __getitem__(self: LazyRecords, index: int | slice) -> LazyRecord | list[LazyRecord]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if (record := self.records[index]) is None:
+            record = self.records[index] = LazyRecord(self.model, self.raw[index])
+        return record
+
+    def validate_all(self: LazyRecords) -> list[BaseModel]:
+        return [record.validate() for record in self]
+
+
+def raw_records(records: Any) -> list[dict[str, Any]]:
+    # Accepts the data of any ValidationMode
+    if isinstance(records, LazyRecords):
+        return records.raw
+    # Raw lists are returned as-is so a cached payload keeps its identity
+    if isinstance(records, list) and not (records and isinstance(records[0], BaseModel)):
+        return records
+    return [r.model_dump() if isinstance(r, BaseModel) else r for r in records]
+
+
+# Stable identities of the records each endpoint returns
+
+def match_key(raw: dict[str, Any]) -> Hashable:
+    t: dict[str, Any] = raw["match_info"]["match_tuple"]
+    return t["session"], t["division"], t["round"], t["instance"], t["match"]
+
+
+def team_key(raw: dict[str, Any]) -> Hashable:
+    # Teams and skills rankings
+    return raw["number"]
+
+
+def ranking_key(raw: dict[str, Any]) -> Hashable:
+    # The ranked alliance, a rank position moves between alliances as results come in
+    alliance: dict[str, Any] = raw["alliance"][0] if isinstance(raw["alliance"], list) else raw["alliance"]
+    return alliance["name"]
+
+
+def as_typed(rs: APIResult, model: type[BaseModel], mode: ValidationMode) -> APIResult:
+    # rs.data must already be the list of raw records
+    if not rs.success:
+        return rs
+    match mode:
+        case ValidationMode.Lazy:
+            rs.data = LazyRecords(model, rs.data)
+        case ValidationMode.Full:
+            try:
+                rs.data = [model.model_validate(record) for record in rs.data]
+            except ValidationError as e:
+                return APIFailure(
+                    error=TMError.InvalidResponse,
+                    error_details=e
+                )
+    return rs
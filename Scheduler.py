@@ -0,0 +1,264 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from Types import APIResult, PollStats, generic_to_string
+
+Fetch = Callable[[], APIResult | Awaitable[APIResult]]
+PollCallback = Callable[[str, APIResult], Any]
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket shared by every poll, caps requests per second against the TM server."""
+
+    def __init__(self: RateLimiter, rate: float, burst: int = 1):
+        self.rate: float = rate
+        self.burst: int = burst
+        self.tokens: float = burst
+        self.updated: float = time.monotonic()
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["lock"])
+
+    async def acquire(self: RateLimiter) -> None:
+        async with self.lock:
+            while True:
+                now: float = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return None
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PollTarget:
+    def __init__(
+            self: PollTarget,
+            name: str,
+            fetch: Fetch,
+            freshness: float,
+            min_interval: float,
+            max_interval: float,
+            callback: PollCallback | None
+    ):
+        self.name: str = name
+        self.fetch: Fetch = fetch
+        # Seconds, the interval starts at the target freshness and adapts between the bounds
+        self.freshness: float = freshness
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+        self.interval: float = freshness
+        self.callback: PollCallback | None = callback
+        self.polls: int = 0
+        self.changes: int = 0
+        self.not_modified: int = 0
+        self.failures: int = 0
+        self.not_modified_streak: int = 0
+        self.active: bool = True
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["fetch", "callback"])
+
+    def adapt(self: PollTarget, rs: APIResult, speedup: float, backoff: float, streak: int) -> None:
+        self.polls += 1
+        if not rs.success:
+            self.failures += 1
+            self.interval = min(self.max_interval, self.interval * backoff)
+        elif rs.cached:
+            self.not_modified += 1
+            self.not_modified_streak += 1
+            if self.not_modified_streak >= streak:
+                self.interval = min(self.max_interval, self.interval * backoff)
+        else:
+            self.changes += 1
+            self.not_modified_streak = 0
+            # A change after the very first poll means the endpoint is live, poll it more often
+            if self.polls > 1:
+                self.interval = max(self.min_interval, min(self.freshness, self.interval) * speedup)
+        return None
+
+    @property
+    def stats(self: PollTarget) -> PollStats:
+        return PollStats(
+            name=self.name,
+            interval=self.interval,
+            polls=self.polls,
+            changes=self.changes,
+            not_modified=self.not_modified,
+            failures=self.failures
+        )
+
+
+class PollScheduler:
+    """Polls registered endpoints on one event loop with If-Modified-Since requests.
+
+    Endpoints that change are polled faster, down to min_interval, while a streak of 304s
+    backs off toward max_interval. All polls share one RateLimiter. Results are delivered to
+    the target's callback and to every iterator returned by results()."""
+
+    def __init__(
+            self: PollScheduler,
+            client,
+            max_rps: float = 10.0,
+            speedup: float = 0.5,
+            backoff: float = 1.5,
+            backoff_streak: int = 3
+    ):
+        self.client = client  # Of type Client or AsyncClient, not imported to prevent circular imports
+        self.is_async: bool = inspect.iscoroutinefunction(client.get)
+        self.limiter: RateLimiter = RateLimiter(max_rps, burst=max(1, int(max_rps)))
+        self.speedup: float = speedup
+        self.backoff: float = backoff
+        self.backoff_streak: int = backoff_streak
+        self.targets: dict[str, PollTarget] = dict()
+        # (due time, tie breaker, target), entries whose target was unregistered or replaced are skipped
+        self.schedule: list[tuple[float, int, PollTarget]] = []
+        self.sequence: itertools.count = itertools.count()
+        self.subscribers: list[asyncio.Queue[tuple[str, APIResult]]] = []
+        self.wakeup: asyncio.Event = asyncio.Event()
+        self.tasks: set[asyncio.Task] = set()
+        self.running: bool = False
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(
+            *args, **kwargs, ignored_fields=["client", "schedule", "sequence", "subscribers", "wakeup", "tasks"]
+        )
+
+    def register(
+            self: PollScheduler,
+            name: str,
+            fetch: Fetch,
+            freshness: float = 1.0,
+            min_interval: float | None = None,
+            max_interval: float | None = None,
+            callback: PollCallback | None = None
+    ) -> PollTarget:
+        if name in self.targets:
+            raise ValueError(f"{name} is already registered")
+        target: PollTarget = PollTarget(
+            name=name,
+            fetch=fetch,
+            freshness=freshness,
+            min_interval=min_interval if min_interval is not None else freshness / 4,
+            max_interval=max_interval if max_interval is not None else freshness * 10,
+            callback=callback
+        )
+        self.targets[name] = target
+        self.push(target, time.monotonic())
+        return target
+
+    def unregister(self: PollScheduler, name: str) -> None:
+        if (target := self.targets.pop(name, None)) is not None:
+            target.active = False
+            self.schedule = [entry for entry in self.schedule if entry[2] is not target]
+            heapq.heapify(self.schedule)
+        return None
+
+    def getter(self: PollScheduler, sync: Callable[..., APIResult], async_: Callable[..., Awaitable[APIResult]], *args) -> Fetch:
+        if self.is_async:
+            return lambda: async_(*args)
+        return lambda: asyncio.to_thread(sync, *args)
+
+    def register_matches(self: PollScheduler, division, freshness: float = 1.0, **kwargs) -> PollTarget:
+        return self.register(
+            f"matches/{division.id}",
+            self.getter(division.get_matches, division.get_matches_async),
+            freshness,
+            **kwargs
+        )
+
+    def register_rankings(self: PollScheduler, division, _round: int, freshness: float = 5.0, **kwargs) -> PollTarget:
+        return self.register(
+            f"rankings/{division.id}/{_round}",
+            self.getter(division.get_rankings, division.get_rankings_async, _round),
+            freshness,
+            **kwargs
+        )
+
+    def register_teams(self: PollScheduler, division, freshness: float = 60.0, **kwargs) -> PollTarget:
+        return self.register(
+            f"teams/{division.id}",
+            self.getter(division.get_teams, division.get_teams_async),
+            freshness,
+            **kwargs
+        )
+
+    def register_skills(self: PollScheduler, freshness: float = 10.0, **kwargs) -> PollTarget:
+        fetch: Fetch = self.client.get_skills if self.is_async \
+            else lambda: asyncio.to_thread(self.client.get_skills)
+        return self.register("skills", fetch, freshness, **kwargs)
+
+    def push(self: PollScheduler, target: PollTarget, due: float) -> None:
+        heapq.heappush(self.schedule, (due, next(self.sequence), target))
+        self.wakeup.set()
+        return None
+
+    async def results(self: PollScheduler, maxsize: int = 0) -> AsyncIterator[tuple[str, APIResult]]:
+        queue: asyncio.Queue[tuple[str, APIResult]] = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.subscribers.remove(queue)
+
+    async def poll(self: PollScheduler, target: PollTarget) -> None:
+        try:
+            await self.limiter.acquire()
+            result: APIResult | Awaitable[APIResult] = target.fetch()
+            rs: APIResult = await result if inspect.isawaitable(result) else result
+            target.adapt(rs, self.speedup, self.backoff, self.backoff_streak)
+            for queue in self.subscribers:
+                # A full subscriber misses this result rather than stalling every other poll
+                if not queue.full():
+                    queue.put_nowait((target.name, rs))
+            if target.callback is not None:
+                if inspect.isawaitable(called := target.callback(target.name, rs)):
+                    await called
+        except Exception:
+            logger.exception("poll of %s failed", target.name)
+        finally:
+            # A failing fetch or callback must not stop the endpoint from being polled
+            if target.active and self.running:
+                self.push(target, time.monotonic() + target.interval)
+        return None
+
+    async def run(self: PollScheduler) -> None:
+        self.running = True
+        try:
+            while self.running:
+                self.wakeup.clear()
+                now: float = time.monotonic()
+                while self.schedule and self.schedule[0][0] <= now:
+                    _, _, target = heapq.heappop(self.schedule)
+                    if target.active and self.targets.get(target.name) is target:
+                        task: asyncio.Task = asyncio.create_task(self.poll(target))
+                        self.tasks.add(task)
+                        task.add_done_callback(self.tasks.discard)
+                timeout: float | None = self.schedule[0][0] - now if self.schedule else None
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
+        finally:
+            self.running = False
+            for task in list(self.tasks):
+                task.cancel()
+        return None
+
+    def stop(self: PollScheduler) -> None:
+        self.running = False
+        self.wakeup.set()
+        return None
+
+    @property
+    def stats(self: PollScheduler) -> list[PollStats]:
+        return [target.stats for target in self.targets.values()]
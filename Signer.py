@@ -0,0 +1,62 @@
+import datetime
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+from urllib.parse import urlparse, ParseResult
+
+from RFC1123_Date import RFC1123Date
+from Types import generic_to_string
+
+
+@lru_cache(maxsize=512)
+def split_url(url: str) -> tuple[str, str]:
+    # Returns the signed request target (path + query, as TM expects it) and the host
+    parsed_url: ParseResult = urlparse(url)
+    return parsed_url.path + parsed_url.query, parsed_url.netloc
+
+
+class Signer:
+    """Produces the TM request signing headers.
+
+    The keyed HMAC state is prepared once and copied per request, the x-tm-date
+    is formatted at most once per second and the token-dependent parts are
+    rebuilt only when the bearer token changes."""
+
+    def __init__(self: Signer, client_api_key: str):
+        self.keyed: hmac.HMAC = hmac.new(key=client_api_key.encode("UTF-8"), digestmod=hashlib.sha256)
+        # (access_token, "token:..." line, Authorization header), swapped as a whole to stay thread safe
+        self.token_parts: tuple[str, str, str] | None = None
+        # (epoch second, formatted date)
+        self.date_parts: tuple[int, str] = (-1, "")
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["keyed"])
+
+    def tm_date(self: Signer) -> str:
+        # TM dates look like "Wed, 04 Feb 2026 06:48:25 GMT"
+        second: int = int(time.time())
+        if (parts := self.date_parts)[0] != second:
+            parts = (second, str(RFC1123Date(datetime.datetime.fromtimestamp(second, datetime.UTC))))
+            self.date_parts = parts
+        return parts[1]
+
+    def sign(self: Signer, url: str, access_token: str, method: str = "GET") -> dict[str, str]:
+        if (token_parts := self.token_parts) is None or token_parts[0] != access_token:
+            token_parts = (access_token, f"token:{access_token}", f"Bearer {access_token}")
+            self.token_parts = token_parts
+
+        target, host = split_url(url)
+        tm_date: str = self.tm_date()
+
+        string_to_sign: str = f"{method}\n{target}\n{token_parts[1]}\nhost:{host}\nx-tm-date:{tm_date}\n"
+
+        signature: hmac.HMAC = self.keyed.copy()
+        signature.update(string_to_sign.encode("UTF-8"))
+
+        return {
+            "Authorization": token_parts[2],
+            "x-tm-date": tm_date,
+            "x-tm-signature": signature.hexdigest(),
+            "Host": host
+        }
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable
+
+from Types import APIResult, generic_to_string
+
+
+class SingleFlight:
+    """Coalesces concurrent requests for the same key into one upstream call.
+
+    Callers that arrive while a call is in flight wait for it. Every caller, the one that made the
+    call included, receives its own copy of the APIResult, so each can unwrap rs.data without
+    affecting the others."""
+
+    def __init__(self: SingleFlight):
+        self.lock: threading.Lock = threading.Lock()
+        self.calls: dict[Hashable, Future] = dict()
+        # Keyed by (event loop, key), an asyncio task belongs to a single loop
+        self.tasks: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = dict()
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["lock", "calls", "tasks"])
+
+    def do(self: SingleFlight, key: Hashable, func: Callable[[], APIResult]) -> APIResult:
+        with self.lock:
+            if (future := self.calls.get(key)) is None:
+                future = self.calls[key] = Future()
+                leader: bool = True
+            else:
+                leader: bool = False
+
+        if not leader:
+            return future.result().model_copy()
+
+        try:
+            rs: APIResult = func()
+        except BaseException as e:
+            self.finish(key)
+            future.set_exception(e)
+            raise
+        self.finish(key)
+        future.set_result(rs)
+        # Followers may copy rs as soon as it is set, so the leader must not hand out rs itself either
+        return rs.model_copy()
+
+    def finish(self: SingleFlight, key: Hashable) -> None:
+        # Callers arriving after this start a fresh request instead of reusing a completed one
+        with self.lock:
+            del self.calls[key]
+        return None
+
+    async def do_async(self: SingleFlight, key: Hashable, func: Callable[[], Awaitable[APIResult]]) -> APIResult:
+        task_key: tuple[asyncio.AbstractEventLoop, Hashable] = (asyncio.get_running_loop(), key)
+        if (task := self.tasks.get(task_key)) is None:
+            task = self.tasks[task_key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self.tasks.pop(task_key, None))
+        # shield, so one cancelled caller does not cancel the request for everyone else
+        rs: APIResult = await asyncio.shield(task)
+        # The task result stays shared, each caller gets a copy
+        return rs.model_copy()
+
+    @property
+    def in_flight(self: SingleFlight) -> int:
+        return len(self.calls) + len(self.tasks)
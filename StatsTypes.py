@@ -0,0 +1,184 @@
+import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from Types import HandlerMode, OverflowPolicy, Field, numeric, generic_to_string
+
+# Stats, diffs, snapshots and MockServer settings. Built the first time one is imported, usually through Types
+
+class MockServerArgs(BaseModel):
+    host: str = "127.0.0.1"
+    # 0 picks a free port
+    port: int = 0
+    auth_port: int = 0
+    client_api_key: str = "mock-client-api-key"
+    client_id: str = "mock-client-id"
+    client_secret: str = "mock-client-secret"
+    token_lifetime: datetime.timedelta = datetime.timedelta(hours=1)
+    verify_signatures: bool = True
+    # Seconds added to every REST response and handshake, plus up to latency_jitter more
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Fraction of REST requests answered with failure_status instead
+    failure_rate: float = 0.0
+    failure_status: int = 500
+    divisions: int = 1
+    teams_per_division: int = 40
+    matches_per_division: int = 120
+    fieldsets: int = 1
+    fields_per_fieldset: int = 2
+    # Synthetic websocket events per second on each fieldset, 0 sends only replies to commands
+    # and math.inf as fast as the server can
+    event_rate: float = 1.0
+    # Seconds between scoring the next match of every division, None leaves the schedule unplayed
+    score_interval: float | None = 5.0
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class MockServerStats(BaseModel):
+    requests: int = 0
+    not_modified: int = 0
+    injected_failures: int = 0
+    unauthorized: int = 0
+    tokens_issued: int = 0
+    # TCP connections REST requests and websocket upgrades arrived on, REST ones are reused
+    http_connections: int = 0
+    # Websocket connections
+    connections: int = 0
+    frames_sent: int = 0
+    commands: int = 0
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class TableUpdate(BaseModel):
+    added: int
+    changed: int
+    removed: int
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class RecordDiff(BaseModel):
+    # Raw JSON records, changed holds the new version of each record
+    added: list[Any] = []
+    changed: list[Any] = []
+    removed: list[Any] = []
+
+    @property
+    def empty(self) -> bool: return not (self.added or self.changed or self.removed)
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class RecordsChanged(BaseModel):
+    # type is one of DiffEventTypes, path the endpoint the diff was computed for
+    type: str
+    path: str
+    diff: RecordDiff
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class PollStats(BaseModel):
+    name: str
+    # Current polling interval in seconds
+    interval: float
+    polls: int
+    changes: int
+    not_modified: int
+    failures: int
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class ConnectionStats(BaseModel):
+    connected: bool = False
+    reconnects: int = 0
+    reconnect_attempts: int = 0
+    downtime: datetime.timedelta = datetime.timedelta(0)
+    last_disconnect: datetime.datetime | None = None
+    last_error: Any = None
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class ReplayStats(BaseModel):
+    records: int = 0
+    frames: int = 0
+    responses: int = 0
+    # Seconds of recorded time that were replayed, and how long replaying them took
+    journal_time: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class HandlerStats(BaseModel):
+    event_type: str
+    mode: HandlerMode
+    overflow: OverflowPolicy
+    maxsize: int
+    queue_depth: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    failures: int = 0
+    # Seconds between an event being dispatched and its handler starting on it
+    lag: float = 0.0
+    max_lag: float = 0.0
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class CommandStats(BaseModel):
+    maxsize: int
+    queue_depth: int = 0
+    sent: int = 0
+    confirmed: int = 0
+    timed_out: int = 0
+    failed: int = 0
+    # Seconds between sending a command and the event confirming it
+    latency: float = 0.0
+    max_latency: float = 0.0
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class DivisionSnapshot(BaseModel):
+    id: numeric
+    name: str
+    # Lists of records, shaped by ClientArgs.validation (raw dicts, LazyRecords or validated models)
+    teams: Any
+    matches: Any
+    rankings: dict[str, Any]
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class FieldsetSnapshot(BaseModel):
+    id: numeric
+    name: str
+    fields: list[Field]
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class EventSnapshot(BaseModel):
+    event_info: Any
+    skills: Any
+    divisions: list[DivisionSnapshot]
+    fieldsets: list[FieldsetSnapshot]
+    # Number of REST calls made for the snapshot, and how many of them were answered with a 304
+    requests: int
+    cache_hits: int
+    taken_at: datetime.datetime
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
@@ -0,0 +1,243 @@
+from abc import ABC, abstractmethod
+from collections.abc import Hashable, Sequence
+from typing import Any
+
+import numpy as np
+
+from Records import raw_records, match_key, ranking_key
+from Types import MatchRound, MatchState, TableUpdate, generic_to_string
+
+# Round columns hold Tournament Manager's own round numbers, the ones match tuples may carry instead of
+# the name, so "SF" and 4 are the same round. Integer rounds are kept as-is
+ROUND_CODES: dict[MatchRound, int] = {
+    MatchRound.NONE: 0,
+    MatchRound.Practice: 1,
+    MatchRound.Qualification: 2,
+    MatchRound.Semifinal: 4,
+    MatchRound.Final: 5,
+    MatchRound.RoundOf16: 6,
+    MatchRound.RoundOf32: 7,
+    MatchRound.RoundOf64: 8,
+    MatchRound.RoundOf128: 9,
+    MatchRound.TopN: 15,
+    MatchRound.RoundRobin: 16,
+    MatchRound.Skills: 18,
+    MatchRound.Timeout: 19
+}
+# State columns hold these integer codes
+STATE_CODES: dict[MatchState, int] = {s: i for i, s in enumerate(MatchState)}
+
+# Team slots per alliance, unused slots hold -1
+ALLIANCE_WIDTH: int = 4
+
+
+def round_code(value: MatchRound | str | int) -> int:
+    return ROUND_CODES[MatchRound(value)] if isinstance(value, str) else int(value)
+
+
+class ColumnTable(ABC):
+    """Keyed records stored column by column in NumPy arrays.
+
+    update() re-applies a polled payload, only rows whose raw JSON changed are rewritten.
+    Columns are read as table["name"] or table.name."""
+
+    # name -> (dtype, per-row shape)
+    columns: dict[str, tuple[type, tuple[int, ...]]] = dict()
+
+    def __init__(self: ColumnTable, records: Any = ()):
+        self.keys: list[Hashable] = []
+        self.rows: dict[Hashable, int] = dict()
+        self.raw: list[dict[str, Any]] = []
+        self.source: Any = None
+        self.teams: list[str] = []
+        self.team_index: dict[str, int] = dict()
+        self.data: dict[str, np.ndarray] = {
+            name: np.empty((0, *shape), dtype=dtype) for name, (dtype, shape) in self.columns.items()
+        }
+        self.update(records)
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["keys", "rows", "raw", "source", "team_index"])
+
+    def __len__(self: ColumnTable) -> int:
+        return len(self.keys)
+
+    def __getitem__(self: ColumnTable, column: str) -> np.ndarray:
+        return self.data[column]
+
+    def __getattr__(self: ColumnTable, name: str) -> np.ndarray:
+        if name != "data" and name in self.columns:
+            return self.data[name]
+        raise AttributeError(name)
+
+    @abstractmethod
+    def key(self: ColumnTable, raw: dict[str, Any]) -> Hashable: ...
+
+    @abstractmethod
+    def row(self: ColumnTable, raw: dict[str, Any]) -> dict[str, Any]: ...
+
+    def team_id(self: ColumnTable, number: str) -> int:
+        # Index of the team in self.teams, allocated on first sight. Not named after any column, see __getattr__
+        if (index := self.team_index.get(number)) is None:
+            index = self.team_index[number] = len(self.teams)
+            self.teams.append(number)
+        return index
+
+    def update(self: ColumnTable, records: Any) -> TableUpdate:
+        # A 304 hands back the very same cached list, nothing can have changed
+        if (raws := raw_records(records)) is self.source:
+            return TableUpdate(added=0, changed=0, removed=0)
+        self.source = raws
+
+        seen: set[Hashable] = set()
+        added: list[tuple[Hashable, dict[str, Any]]] = []
+        changed: int = 0
+        for raw in raws:
+            seen.add(key := self.key(raw))
+            if (index := self.rows.get(key)) is None:
+                added.append((key, raw))
+            elif self.raw[index] != raw:
+                self.write_row(index, raw)
+                changed += 1
+
+        removed: list[int] = [index for key, index in self.rows.items() if key not in seen]
+        if removed:
+            self.remove_rows(removed)
+        if added:
+            self.append_rows(added)
+        return TableUpdate(added=len(added), changed=changed, removed=len(removed))
+
+    def write_row(self: ColumnTable, index: int, raw: dict[str, Any]) -> None:
+        for name, value in self.row(raw).items():
+            self.data[name][index] = value
+        self.raw[index] = raw
+        return None
+
+    def append_rows(self: ColumnTable, added: list[tuple[Hashable, dict[str, Any]]]) -> None:
+        rows: list[dict[str, Any]] = [self.row(raw) for _, raw in added]
+        for name, (dtype, shape) in self.columns.items():
+            new: np.ndarray = np.array([row[name] for row in rows], dtype=dtype).reshape((len(rows), *shape))
+            self.data[name] = np.concatenate((self.data[name], new))
+        for key, raw in added:
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.raw.append(raw)
+        return None
+
+    def remove_rows(self: ColumnTable, removed: list[int]) -> None:
+        keep: np.ndarray = np.ones(len(self.keys), dtype=bool)
+        keep[removed] = False
+        for name in self.columns:
+            self.data[name] = self.data[name][keep]
+        self.keys = [key for key, kept in zip(self.keys, keep) if kept]
+        self.raw = [raw for raw, kept in zip(self.raw, keep) if kept]
+        self.rows = {key: index for index, key in enumerate(self.keys)}
+        return None
+
+    def select(self: ColumnTable, mask: np.ndarray) -> list[dict[str, Any]]:
+        return [self.raw[index] for index in np.flatnonzero(mask)]
+
+
+class MatchTable(ColumnTable):
+    """Columns of Division.get_matches, keyed by match tuple."""
+
+    columns = {
+        "session": (np.int32, ()),
+        "division": (np.int32, ()),
+        "round": (np.int16, ()),
+        "instance": (np.int32, ()),
+        "number": (np.int32, ()),
+        "state": (np.int8, ()),
+        "winning_alliance": (np.int8, ()),
+        "red_score": (np.int32, ()),
+        "blue_score": (np.int32, ()),
+        # Team indices, see teams and team_index
+        "alliances": (np.int32, (2, ALLIANCE_WIDTH))
+    }
+
+    def key(self: MatchTable, raw: dict[str, Any]) -> Hashable:
+        return match_key(raw)
+
+    def row(self: MatchTable, raw: dict[str, Any]) -> dict[str, Any]:
+        info: dict[str, Any] = raw["match_info"]
+        t: dict[str, Any] = info["match_tuple"]
+        score: list[int] = raw.get("finalScore") or [0, 0]
+        alliances: np.ndarray = np.full((2, ALLIANCE_WIDTH), -1, dtype=np.int32)
+        for a, alliance in enumerate(info["alliances"][:2]):
+            for slot, team in enumerate(alliance["teams"][:ALLIANCE_WIDTH]):
+                alliances[a, slot] = self.team_id(team["number"])
+        return {
+            "session": t["session"],
+            "division": t["division"],
+            "round": round_code(t["round"]),
+            "instance": t["instance"],
+            "number": t["match"],
+            "state": STATE_CODES[MatchState(raw["state"])],
+            "winning_alliance": raw.get("winning_alliance", 0),
+            "red_score": score[0] if len(score) > 0 else 0,
+            "blue_score": score[1] if len(score) > 1 else 0,
+            "alliances": alliances
+        }
+
+    def mask(
+            self: MatchTable,
+            rounds: Sequence[MatchRound | str | int] | MatchRound | str | int | None = None,
+            state: MatchState | None = None
+    ) -> np.ndarray:
+        mask: np.ndarray = np.ones(len(self), dtype=bool)
+        if rounds is not None:
+            rounds = [rounds] if isinstance(rounds, str | int | np.integer) else rounds
+            mask &= np.isin(self.data["round"], [round_code(r) for r in rounds])
+        if state is not None:
+            mask &= self.data["state"] == STATE_CODES[MatchState(state)]
+        return mask
+
+    def team_mask(self: MatchTable, number: str) -> np.ndarray:
+        if (index := self.team_index.get(number)) is None:
+            return np.zeros(len(self), dtype=bool)
+        return (self.data["alliances"] == index).any(axis=(1, 2))
+
+    def alliance_scores(self: MatchTable) -> np.ndarray:
+        # (rows, 2) array of red and blue scores
+        return np.stack((self.data["red_score"], self.data["blue_score"]), axis=1)
+
+
+class RankingTable(ColumnTable):
+    """Columns of Division.get_rankings, keyed by ranked alliance name."""
+
+    columns = {
+        "rank": (np.int32, ()),
+        # Team index of the alliance's first team
+        "team": (np.int32, ()),
+        "wins": (np.int32, ()),
+        "losses": (np.int32, ()),
+        "ties": (np.int32, ()),
+        "wp": (np.int32, ()),
+        "ap": (np.int32, ()),
+        "sp": (np.int32, ()),
+        "avg_points": (np.float64, ()),
+        "total_points": (np.int32, ()),
+        "high_score": (np.int32, ()),
+        "num_matches": (np.int32, ())
+    }
+
+    @staticmethod
+    def alliance(raw: dict[str, Any]) -> dict[str, Any]:
+        return raw["alliance"][0] if isinstance(raw["alliance"], list) else raw["alliance"]
+
+    def key(self: RankingTable, raw: dict[str, Any]) -> Hashable:
+        return ranking_key(raw)
+
+    def row(self: RankingTable, raw: dict[str, Any]) -> dict[str, Any]:
+        teams: list[int] = [self.team_id(t["number"]) for t in self.alliance(raw)["teams"]]
+        return {
+            "rank": raw["rank"],
+            "team": teams[0] if teams else -1,
+            **{name: raw[name] for name in self.columns if name not in ("rank", "team")}
+        }
+
+    def team_row(self: RankingTable, number: str) -> int | None:
+        if (index := self.team_index.get(number)) is None:
+            return None
+        rows: np.ndarray = np.flatnonzero(self.data["team"] == index)
+        return int(rows[0]) if len(rows) else None
@@ -0,0 +1,192 @@
+import os
+import pickle
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import ContextManager, TYPE_CHECKING
+
+from Types import BearerToken, generic_to_string
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+# fcntl on POSIX, msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock on a file, shared across processes and re-entrant within one process."""
+
+    def __init__(self: FileLock, path: str):
+        self.path: str = path
+        self.thread_lock: threading.RLock = threading.RLock()
+        self.depth: int = 0
+        self.fd: int | None = None
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["thread_lock"])
+
+    def __enter__(self: FileLock) -> FileLock:
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        self.depth += 1
+        return self
+
+    def __exit__(self: FileLock, *exc_info) -> None:
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+            os.close(self.fd)
+            self.fd = None
+        self.thread_lock.release()
+        return None
+
+
+class TokenStore(ABC):
+    """Where Bearer keeps its token between refreshes.
+
+    Bearer holds lock() while it checks the stored token and fetches a new one,
+    so every user of the same store triggers at most one refresh per expiry."""
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+    @abstractmethod
+    def load(self: TokenStore) -> BearerToken | None: ...
+
+    @abstractmethod
+    def save(self: TokenStore, token: BearerToken) -> None: ...
+
+    @abstractmethod
+    def clear(self: TokenStore) -> None: ...
+
+    @abstractmethod
+    def lock(self: TokenStore) -> ContextManager: ...
+
+
+class MemoryTokenStore(TokenStore):
+    # Shared by the Clients of one process
+    def __init__(self: MemoryTokenStore):
+        self.token: BearerToken | None = None
+        self.token_lock: threading.RLock = threading.RLock()
+
+    def load(self: MemoryTokenStore) -> BearerToken | None:
+        return self.token
+
+    def save(self: MemoryTokenStore, token: BearerToken) -> None:
+        self.token = token
+        return None
+
+    def clear(self: MemoryTokenStore) -> None:
+        self.token = None
+        return None
+
+    def lock(self: MemoryTokenStore) -> ContextManager:
+        return self.token_lock
+
+
+class FileTokenStore(TokenStore):
+    # The pickle Bearer has always written, now replaced atomically under a lock file
+    def __init__(self: FileTokenStore, path: str = "latest_bearer.pickle"):
+        self.path: str = path
+        self.file_lock: FileLock = FileLock(f"{path}.lock")
+
+    def load(self: FileTokenStore) -> BearerToken | None:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as fin:
+                    obj = pickle.load(fin)
+            except Exception:
+                # Truncated or foreign file, unpickling can raise almost anything
+                obj = None
+            if isinstance(obj, BearerToken):
+                return obj
+            self.clear()
+        return None
+
+    def save(self: FileTokenStore, token: BearerToken) -> None:
+        assert isinstance(token, BearerToken)
+        with self.file_lock:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as fout:
+                    pickle.dump(token, fout, pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return None
+
+    def clear(self: FileTokenStore) -> None:
+        with self.file_lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        return None
+
+    def lock(self: FileTokenStore) -> ContextManager:
+        return self.file_lock
+
+
+class SharedMemoryTokenStore(TokenStore):
+    """Token in a named shared memory segment, for worker processes on one host.
+
+    Layout is a 4 byte little-endian length followed by the token as JSON."""
+
+    def __init__(self: SharedMemoryTokenStore, name: str = "dwab_tm_bearer", size: int = 4096):
+        # Imported here, multiprocessing is slow to load and only this store needs it
+        from multiprocessing.shared_memory import SharedMemory
+        self.name: str = name
+        # track=False, the segment must outlive whichever worker happened to create it
+        try:
+            self.memory: SharedMemory = SharedMemory(name=name, create=True, size=size, track=False)
+            self.memory.buf[:4] = bytes(4)
+        except FileExistsError:
+            self.memory: SharedMemory = SharedMemory(name=name, track=False)
+        self.file_lock: FileLock = FileLock(os.path.join(tempfile.gettempdir(), f"{name}.lock"))
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs, ignored_fields=["memory"])
+
+    def load(self: SharedMemoryTokenStore) -> BearerToken | None:
+        with self.file_lock:
+            length: int = int.from_bytes(self.memory.buf[:4], "little")
+            if length == 0:
+                return None
+            data: bytes = bytes(self.memory.buf[4:4 + length])
+        return BearerToken.model_validate_json(data)
+
+    def save(self: SharedMemoryTokenStore, token: BearerToken) -> None:
+        data: bytes = token.model_dump_json().encode("UTF-8")
+        if len(data) + 4 > self.memory.size:
+            raise ValueError(f"token needs {len(data) + 4} bytes, the segment has {self.memory.size}")
+        with self.file_lock:
+            self.memory.buf[4:4 + len(data)] = data
+            self.memory.buf[:4] = len(data).to_bytes(4, "little")
+        return None
+
+    def clear(self: SharedMemoryTokenStore) -> None:
+        with self.file_lock:
+            self.memory.buf[:4] = bytes(4)
+        return None
+
+    def lock(self: SharedMemoryTokenStore) -> ContextManager:
+        return self.file_lock
+
+    def close(self: SharedMemoryTokenStore, unlink: bool = False) -> None:
+        # Only the last user of the segment should unlink it
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+        return None
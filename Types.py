@@ -1,11 +1,12 @@
 import datetime
+import importlib
 import inspect
 from abc import ABC
 from decimal import Decimal
 from enum import StrEnum, Enum
 from typing import Literal, Callable, Optional, Any, Union
 
-from pydantic import BaseModel, InstanceOf, ConfigDict, computed_field
+from pydantic import BaseModel, InstanceOf, ConfigDict, Field as PydanticField, computed_field
 
 
 def generic_to_string(obj, indent="", ignored_fields=None):
@@ -39,6 +40,32 @@ class TMError(StrEnum):
     WebSocketInvalidURL = "Fieldset WebSocket URL is invalid"
     WebSocketError = "Fieldset WebSocket could not be established"
     WebSocketClosed = "Fieldset WebSocket is closed"
+    CommandTimeout = "Tournament Manager did not confirm the fieldset command in time"
+    InvalidResponse = "Tournament Manager Web Server returned data that failed validation"
+
+class ValidationMode(StrEnum):
+    # Raw returns the JSON records as received, Lazy validates each record on first attribute access,
+    # Full validates every record before returning. Lazy and Full return models instead of dicts, and
+    # under Lazy a bad record raises pydantic's ValidationError on access instead of failing the APIResult.
+    # Client.get_skills returns the whole /api/skills body under Raw and its skillsRankings under Lazy and Full
+    Raw = "raw"
+    Lazy = "lazy"
+    Full = "full"
+
+
+class HandlerMode(StrEnum):
+    # Inline runs the handler inside dispatch, Async awaits a coroutine handler on the event loop,
+    # Thread runs the handler in an executor. Async and Thread handlers are fed through their own queue
+    Inline = "inline"
+    Async = "async"
+    Thread = "thread"
+
+
+class OverflowPolicy(StrEnum):
+    # What a full handler queue does with the next event
+    DropOldest = "drop_oldest"
+    Block = "block"
+    CoalesceLatest = "coalesce_latest"
 
 
 class RemoteAuthorizationArgs(BaseModel):
@@ -62,16 +89,68 @@ class AuthorizationArgs(BaseModel):
     def __str__(*args, indent="", **kwargs):
         return generic_to_string(*args, **kwargs)
 
+class SessionArgs(BaseModel):
+    # Sizing of the urllib3 pool shared by every REST call and the bearer fetch
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    keep_alive: bool = True
+    max_retries: int = 0
+    # Seconds
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+
+    @property
+    def timeout(self) -> tuple[float, float]: return self.connect_timeout, self.read_timeout
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class CacheArgs(BaseModel):
+    # None disables the corresponding bound
+    max_entries: int | None = 1024
+    max_bytes: int | None = 64 * 1024 * 1024
+    ttl: datetime.timedelta | None = None
+    # SQLite file the cache is persisted to, so a restart can go straight to conditional requests
+    persist_path: str | None = None
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
+class ReconnectArgs(BaseModel):
+    # Seconds, the delay doubles from initial_delay up to max_delay and is jittered by ±jitter
+    initial_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+
+    def __str__(*args, indent="", **kwargs):
+        return generic_to_string(*args, **kwargs)
+
 class ClientArgs(BaseModel):
     address: str
     clientAPIKey: str
     bearer_margin: datetime.timedelta = datetime.timedelta(seconds=0)
     authorization_args: AuthorizationArgs
+    # Renew the bearer in the background this long before it stops being viable
+    bearer_refresh: bool = True
+    bearer_refresh_lead: datetime.timedelta = datetime.timedelta(seconds=60)
+    session_args: SessionArgs = SessionArgs()
+    cache_args: CacheArgs = CacheArgs()
+    validation: ValidationMode = ValidationMode.Raw
+    reconnect_args: ReconnectArgs = ReconnectArgs()
+    # Journal file every websocket frame and REST response is appended to, see Journal.py
+    journal_path: str | None = None
+    # OAuth token endpoint, None is Client.connection_string, DWAB's own
+    auth_address: str | None = None
 
 class BearerToken(BaseModel):
     access_token: str
     token_type: str
     expires_in: datetime.timedelta
+    issued_at: datetime.datetime = PydanticField(default_factory=lambda: datetime.datetime.now(datetime.UTC))
+
+    @property
+    def expires_at(self) -> datetime.datetime: return self.issued_at + self.expires_in
 
 class BearerSuccess(BaseModel):
     @computed_field
@@ -139,19 +218,6 @@ class APIFailure(BaseModel):
 
 APIResult = Union[APISuccess, APIFailure]
 
-class SkillsRanking(BaseModel):
-    rank: int
-    tie: bool
-    number: str
-    totalScore: int
-    progHighScore: int
-    progAttempts: int
-    driverHighScore: int
-    driverAttempts: int
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
 class EventInfo(BaseModel):
     code: str
     name: str
@@ -194,41 +260,6 @@ class FieldsetData(BaseModel):
 
 FieldID = numeric
 
-class FieldsetEvent(BaseModel, ABC):
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class FieldMatchAssigned(FieldsetEvent):
-    @computed_field
-    @property
-    def type(self) -> str: return "fieldMatchAssigned"
-    field_id: FieldID | None
-    match: MatchTuple | None
-
-class FieldActivated(FieldsetEvent):
-    @computed_field
-    @property
-    def type(self) -> str: return "fieldActivated"
-    field_id: FieldID | None
-
-class MatchStarted(FieldsetEvent):
-    @computed_field
-    @property
-    def type(self) -> str: return "matchStarted"
-    field_id: FieldID | None
-
-class MatchStopped(FieldsetEvent):
-    @computed_field
-    @property
-    def type(self) -> str: return "matchStopped"
-    field_id: FieldID | None
-
-class AudienceDisplayChanged(FieldsetEvent):
-    @computed_field
-    @property
-    def type(self) -> str: return "audienceDisplayChanged"
-    display: AudienceDisplay | None
-
 class AudienceDisplay(StrEnum):
     Blank = "BLANK"
     Logo = "LOGO"
@@ -251,56 +282,6 @@ FieldsetEventTypes = (
     "audienceDisplayChanged"
 )
 
-class FieldsetCommand(BaseModel, ABC):
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class StartMatch(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "start"
-    field_id: numeric
-
-class EndMatchEarly(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "endEarly"
-    field_id: numeric
-
-class AbortMatch(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "abort"
-    field_id: numeric
-
-class ResetTimer(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "reset"
-    field_id: numeric
-
-class QueuePreviousMatch(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "queuePrevMatch"
-
-class QueueNextMatch(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "queueNextMatch"
-
-class QueueSkills(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "queueSkills"
-    skills_id: QueueSkillsType
-
-class SetAudienceDisplay(FieldsetCommand):
-    @computed_field
-    @property
-    def cmd(self) -> str: return "setAudienceDisplay"
-    display: AudienceDisplay
-
 class QueueSkillsType(Enum):
     Programming = 1
     Driver = 2
@@ -326,50 +307,6 @@ class QueueState(Enum):
     Running = 1
     Stopped = 2
 
-class FieldsetMatchActiveNone(BaseModel):
-    @computed_field
-    @property
-    def type(self) -> ActiveMatchType: return ActiveMatchType.NONE
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class FieldsetMatchActiveTimeout(BaseModel):
-    @computed_field
-    @property
-    def type(self) -> ActiveMatchType: return ActiveMatchType.Timeout
-    state: QueueState
-    field_id: numeric
-    active: bool
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class FieldsetMatchActiveMatch(BaseModel):
-    @computed_field
-    @property
-    def type(self) -> ActiveMatchType: return ActiveMatchType.Match
-    state: QueueState
-    match: MatchTuple
-    field_id: numeric
-    active: bool
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-FieldsetMatch = Union[
-    FieldsetMatchActiveNone,
-    FieldsetMatchActiveTimeout,
-    FieldsetMatchActiveMatch
-]
-
-class FieldsetState(BaseModel):
-    match: FieldsetMatch
-    audience_display: AudienceDisplay
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
 class MatchState(StrEnum):
     Unplayed = "UNPLAYED"
     Scored = "SCORED"
@@ -389,90 +326,86 @@ class MatchRound(StrEnum):
     Skills = "SKILLS"
     Timeout = "TIMEOUT"
 
-class _team(BaseModel):
-    number: str
-
-class MatchAlliance(BaseModel):
-    teams: list[_team]
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class MatchTuple(BaseModel):
-    session: int
-    division: int
-    round: int
-    instance: int
-    match: int
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class Match(BaseModel):
-    class MatchInfo(BaseModel):
-        time_scheduled: datetime.datetime
-        state: MatchState
-        alliances: list[MatchAlliance]
-        match_tuple: MatchTuple
-    winning_alliance: int
-    finalScore: list[int]
-    state: MatchState
-    match_info: MatchInfo
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class RankAlliance(BaseModel):
-    name: str
-    teams: list[_team]
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
-class Ranking(BaseModel):
-    rank: int
-    tied: Literal[False]
-    alliance: list[RankAlliance]
-    wins: int
-    losses: int
-    ties: int
-    wp: int
-    ap: int
-    sp: int
-    avg_points: numeric
-    total_points: int
-    high_score: int
-    num_matches: int
-    min_num_matches: bool
-
-    def __str__(*args, indent="", **kwargs):
-        return generic_to_string(*args, **kwargs)
-
 class AgeGroup(StrEnum):
     HighSchool = "HIGH_SCHOOL"
     MiddleSchool = "MIDDLE_SCHOOL"
     ElementarySchool = "ELEMENTARY_SCHOOL"
     College = "COLLEGE"
 
-class Team(BaseModel):
-    number: str
-    name: str
-    city: str
-    state: str
-    country: str
-    age_group: AgeGroup
-    div_id: int
-    checked_in: bool
-    # Deprecated
-    short_name: str
-    sponsors: str
+class EndpointCacheMember(BaseModel):
+    data: Any
+    last_modified: datetime.datetime
+    # Size of the response body in bytes, counted against CacheArgs.max_bytes
+    size: int = 0
 
     def __str__(*args, indent="", **kwargs):
         return generic_to_string(*args, **kwargs)
 
-class EndpointCacheMember(BaseModel):
-    data: Any
-    last_modified: datetime.datetime
+class EndpointCacheStats(BaseModel):
+    entries: int
+    size: int
+    # hits found a fresh entry and sent a conditional request, not_modified counts the 304s that followed
+    hits: int
+    misses: int
+    not_modified: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def not_modified_ratio(self) -> float:
+        # Of all lookups, those answered from the cache after a 304
+        lookups: int = self.hits + self.misses
+        return self.not_modified / lookups if lookups else 0.0
 
     def __str__(*args, indent="", **kwargs):
         return generic_to_string(*args, **kwargs)
+
+DiffEventTypes = (
+    "matchesChanged",
+    "teamsChanged",
+    "rankingsChanged",
+    "skillsChanged"
+)
+
+
+# Models a plain REST call never touches live in these modules, which are only imported, and their
+# classes built, the first time one of their names is looked up here. `from Types import Match` works as before.
+LAZY_MODULES: dict[str, str] = {
+    **dict.fromkeys((
+        "SkillsRanking", "MatchAlliance", "MatchTuple", "Match", "RankAlliance", "Ranking", "Team"
+    ), "RecordTypes"),
+    **dict.fromkeys((
+        "FieldsetEvent", "FieldMatchAssigned", "FieldActivated", "MatchStarted", "MatchStopped",
+        "AudienceDisplayChanged", "FieldsetCommand", "StartMatch", "EndMatchEarly", "AbortMatch", "ResetTimer",
+        "QueuePreviousMatch", "QueueNextMatch", "QueueSkills", "SetAudienceDisplay", "FieldsetMatchActiveNone",
+        "FieldsetMatchActiveTimeout", "FieldsetMatchActiveMatch", "FieldsetMatch", "FieldsetState"
+    ), "FieldsetTypes"),
+    **dict.fromkeys((
+        "MockServerArgs", "MockServerStats", "TableUpdate", "RecordDiff", "RecordsChanged", "PollStats",
+        "ConnectionStats", "ReplayStats", "HandlerStats", "CommandStats", "DivisionSnapshot", "FieldsetSnapshot",
+        "EventSnapshot"
+    ), "StatsTypes")
+}
+
+
+def __getattr__(name: str) -> Any:
+    if (module := LAZY_MODULES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value: Any = getattr(importlib.import_module(module), name)
+    # Later lookups find it directly
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *LAZY_MODULES]
+
+
+# `from Types import *` still brings in every model, building the lazy ones
+__all__: list[str] = [name for name in (*globals(), *LAZY_MODULES) if not name.startswith("_")]
@@ -47,12 +47,13 @@ async def main():
             print(fieldset_conn)
     # await check_fieldset()
 
-    def check_event_handling():
+    async def check_event_handling():
         if (result := client.get_fieldsets()).success:
             fieldset = result.data[0]
 
-            def handler(event: FieldsetEvent | None = None):
-                print(f"HANDLER for {ev_type} GOT {event}")
+            # Handlers take exactly one parameter named event, coroutine functions are awaited
+            def handler(event: FieldsetEvent):
+                print(f"HANDLER for {event.type} GOT {event}")
 
             for ev_type in FieldsetEventTypes:
                 fieldset.on_event(event_type=ev_type, func=handler)
@@ -74,12 +75,27 @@ async def main():
                 MatchStopped(field_id=1),
                 AudienceDisplayChanged(display=AudienceDisplay.Logo)
             ]:
-                fieldset.ws_receiver(event)
-    # check_event_handling()
+                await fieldset.ws_receiver(event)
+    # await check_event_handling()
 
-    def check_commands_work():
-        pass
-    # check_commands_work()
+    async def check_commands_work():
+        if (result := client.get_fieldsets()).success:
+            fieldset = result.data[0]
+            await fieldset.connect()
+
+            # Each command waits for the event confirming it, a CommandTimeout failure if none arrives
+            result = await fieldset.queue_next_match()
+            print(result)
+
+            if result.success and result.data.field_id is not None:
+                result = await fieldset.start_match(result.data.field_id)
+                print(result)
+
+            result = await fieldset.set_audience_display(AudienceDisplay.InMatch)
+            print(result)
+
+            await fieldset.disconnect()
+    # await check_commands_work()
 
 
 
@@ -0,0 +1,493 @@
+import argparse
+import asyncio
+import datetime
+import hmac
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from importlib import metadata
+from typing import Any, Callable
+from urllib.parse import urlparse, ParseResult
+
+import Decoder
+import EventDecoder
+import Metrics
+from AsyncClient import AsyncClient
+from Client import Client
+from Fieldset import Fieldset
+from FieldsetManager import FieldsetManager
+from Journal import JournalRecorder, JournalReplayer
+from MockServer import MockServer, MockTournament
+from RFC1123_Date import RFC1123Date
+from Signer import Signer
+from TokenStore import MemoryTokenStore
+from Types import (
+    FieldMatchAssigned, FieldActivated, MatchStarted, MatchStopped, AudienceDisplayChanged, APISuccess, AuthorizationArgs,
+    BearerToken, ClientArgs, FieldsetData, Match, MockServerArgs, Ranking, RemoteAuthorizationArgs, generic_to_string
+)
+
+# Run from the repository root, e.g. `python benchmarks.py signing rest --json results.json`
+# With no names every benchmark is run. Macro benchmarks start a MockServer in the same process,
+# so their figures include the server's share of the CPU.
+
+BENCHMARKS: dict[str, Callable[[], dict[str, float]]] = dict()
+
+
+def benchmark(func: Callable[[], dict[str, float]]) -> Callable[[], dict[str, float]]:
+    BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def per_op_us(stmt: Callable[[], object], number: int) -> float:
+    # Best of 5 repeats, in microseconds per call
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def legacy_authorization_headers(client_api_key: str, access_token: str, url: str, method: str = "GET") -> dict:
+    # The signing path Client.get_authorization_headers used before Signer
+    tm_date: str = str(RFC1123Date(datetime.datetime.now(datetime.timezone.utc)))
+    parsed_url: ParseResult = urlparse(url)
+    string_to_sign: str = "\n".join([
+        method,
+        parsed_url.path + parsed_url.query,
+        f"token:{access_token}",
+        f"host:{parsed_url.netloc}",
+        f"x-tm-date:{tm_date}"
+    ])
+    string_to_sign += "\n"
+    signature: hmac.HMAC = hmac.new(key=client_api_key.encode("UTF-8"), digestmod="sha256")
+    signature.update(string_to_sign.encode("UTF-8"))
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "x-tm-date": f"{tm_date}",
+        "x-tm-signature": f"{signature.hexdigest()}",
+        "Host": f"{parsed_url.netloc}"
+    }
+
+
+@benchmark
+def bench_signing(number: int = 20_000) -> dict[str, float]:
+    key, token, url = "client-api-key", "access-token", "http://tm.local/api/matches/1"
+    signer: Signer = Signer(key)
+    return {
+        "legacy_us": per_op_us(lambda: legacy_authorization_headers(key, token, url), number),
+        "signer_us": per_op_us(lambda: signer.sign(url, token), number)
+    }
+
+
+def synthetic_matches(count: int = 500, division: int = 1) -> dict:
+    # Shaped like the /api/matches/{id} payload of a large qualification schedule
+    start: datetime.datetime = datetime.datetime(2026, 4, 22, 8, 0, tzinfo=datetime.UTC)
+    matches: list[dict] = []
+    for i in range(count):
+        teams: list[str] = [f"{(i * 7 + k * 131) % 9000 + 100}{'ABCD'[k]}" for k in range(4)]
+        scored: bool = i < count * 3 // 4
+        matches.append({
+            "winning_alliance": i % 3,
+            "finalScore": [(i * 37) % 180, (i * 53) % 180] if scored else [0, 0],
+            "state": "SCORED" if scored else "UNPLAYED",
+            "match_info": {
+                "time_scheduled": (start + datetime.timedelta(minutes=4 * i)).isoformat(),
+                "state": "SCORED" if scored else "UNPLAYED",
+                "alliances": [
+                    {"teams": [{"number": teams[0]}, {"number": teams[1]}]},
+                    {"teams": [{"number": teams[2]}, {"number": teams[3]}]}
+                ],
+                "match_tuple": {"session": 0, "division": division, "round": "QUAL", "instance": 1, "match": i + 1}
+            }
+        })
+    return {"matches": matches}
+
+
+@benchmark
+def bench_decode(number: int = 50) -> dict[str, float]:
+    body: bytes = json.dumps(synthetic_matches(500)).encode("UTF-8")
+    results: dict[str, float] = {
+        # What Client.get did before: response.json() twice, each decoding the body to a str first
+        "legacy_twice_us": per_op_us(lambda: (json.loads(body.decode("UTF-8")), json.loads(body.decode("UTF-8"))), number),
+        "json_once_us": per_op_us(lambda: json.loads(body), number),
+        "payload_bytes": float(len(body))
+    }
+    if Decoder.orjson is not None:
+        results["orjson_once_us"] = per_op_us(lambda: Decoder.orjson.loads(body), number)
+    return results
+
+
+def legacy_fieldset_event(response: str):
+    # The decoding Fieldset.listen_loop did before EventDecoder
+    data: dict = json.loads(response)
+    data = {k: v if v else None for k, v in data.items()}
+    match data["type"]:
+        case "fieldMatchAssigned":
+            return FieldMatchAssigned(field_id=data["fieldID"], match=data["match"])
+        case "fieldActivated":
+            return FieldActivated(field_id=data["fieldID"])
+        case "matchStarted":
+            return MatchStarted(field_id=data["fieldID"])
+        case "matchStopped":
+            return MatchStopped(field_id=data["fieldID"])
+        case "audienceDisplayChanged":
+            return AudienceDisplayChanged(display=data["display"])
+    return None
+
+
+def synthetic_fieldset_frames(count: int = 1000) -> list[str]:
+    # The message mix of a fieldset running a qualification schedule
+    frames: list[str] = []
+    for i in range(count):
+        field_id: int = i % 4 + 1
+        match i % 5:
+            case 0:
+                message: dict = {"type": "fieldMatchAssigned", "fieldID": field_id, "match": {
+                    "session": 0, "division": 1, "round": 2, "instance": 1, "match": i // 5 + 1
+                }}
+            case 1:
+                message: dict = {"type": "fieldActivated", "fieldID": field_id}
+            case 2:
+                message: dict = {"type": "matchStarted", "fieldID": field_id}
+            case 3:
+                message: dict = {"type": "matchStopped", "fieldID": field_id}
+            case _:
+                message: dict = {"type": "audienceDisplayChanged", "display": "IN_MATCH"}
+        frames.append(json.dumps(message))
+    return frames
+
+
+@benchmark
+def bench_events(number: int = 20) -> dict[str, float]:
+    frames: list[str] = synthetic_fieldset_frames(1000)
+
+    def events_per_second(stmt: Callable[[], object]) -> float:
+        return len(frames) / (per_op_us(stmt, number) / 1e6)
+
+    return {
+        "legacy_eps": events_per_second(lambda: [legacy_fieldset_event(f) for f in frames]),
+        "decoder_eps": events_per_second(lambda: [EventDecoder.decode_frame(f) for f in frames]),
+        "batch_eps": events_per_second(lambda: EventDecoder.decode_batch(frames))
+    }
+
+
+@benchmark
+def bench_replay(count: int = 20_000) -> dict[str, float]:
+    # The whole event pipeline, decode -> update_state -> dispatch, fed from a journal at maximum speed
+    fd, path = tempfile.mkstemp(suffix=".journal")
+    os.close(fd)
+    os.remove(path)
+    try:
+        recorder: JournalRecorder = JournalRecorder(path)
+        for i, frame in enumerate(synthetic_fieldset_frames(count)):
+            recorder.record_frame(i % 8 + 1, frame)
+        recorder.close()
+
+        replayer: JournalReplayer = JournalReplayer(path)
+        for fieldset in replayer.load().values():
+            fieldset.on_event("matchStarted", lambda event: None)
+        stats = asyncio.run(replayer.replay(speed=None))
+        return {"frames": float(stats.frames), "elapsed_s": stats.elapsed, "frames_per_s": stats.frames_per_second}
+    finally:
+        os.remove(path)
+
+
+def micro_client() -> Client:
+    # A Client already holding a token, the signing path never goes to the network
+    args: MockServerArgs = MockServerArgs()
+    client: Client = Client(ClientArgs(
+        address="http://tm.local",
+        clientAPIKey=args.client_api_key,
+        authorization_args=AuthorizationArgs(authorization=RemoteAuthorizationArgs(
+            client_id=args.client_id,
+            client_secret=args.client_secret,
+            expiration_date=datetime.datetime.now(datetime.UTC) + datetime.timedelta(days=1)
+        ))
+    ), MemoryTokenStore())
+    client.bearer.token = BearerToken(access_token="access-token", token_type="Bearer", expires_in=3600)
+    return client
+
+
+# Micro benchmarks, in microseconds per call
+
+@benchmark
+def bench_authorization_headers(number: int = 20_000) -> dict[str, float]:
+    client: Client = micro_client()
+    url: str = "http://tm.local/api/matches/1"
+    try:
+        return {"get_authorization_headers_us": per_op_us(lambda: client.get_authorization_headers(url), number)}
+    finally:
+        client.close()
+
+
+@benchmark
+def bench_rfc1123(number: int = 20_000) -> dict[str, float]:
+    when: datetime.datetime = datetime.datetime(2026, 4, 22, 8, 30, 15)
+    text: str = str(RFC1123Date(when))
+    return {
+        "format_us": per_op_us(lambda: RFC1123Date.utc_datetime_to_rfc1123_str(when), number),
+        "parse_us": per_op_us(lambda: RFC1123Date.rfc1123_str_to_utc_datetime(text), number),
+        "round_trip_us": per_op_us(lambda: str(RFC1123Date(RFC1123Date(text).datetime_obj)), number)
+    }
+
+
+@benchmark
+def bench_fieldset_event(number: int = 5_000) -> dict[str, float]:
+    messages: list[dict] = [json.loads(f) for f in synthetic_fieldset_frames(5)]
+    return {
+        f"{m['type']}_us": per_op_us(lambda m=m: Fieldset.get_fieldset_event(m), number) for m in messages
+    }
+
+
+@benchmark
+def bench_update_state(number: int = 2_000) -> dict[str, float]:
+    fieldset: Fieldset = Fieldset(None, FieldsetData(id=1, name="Benchmark"))
+    events: list = [EventDecoder.decode_frame(f) for f in synthetic_fieldset_frames(5)]
+
+    def cycle() -> None:
+        for event in events:
+            fieldset.update_state(event)
+    return {"per_event_us": per_op_us(cycle, number) / len(events)}
+
+
+@benchmark
+def bench_to_string(number: int = 2_000) -> dict[str, float]:
+    match: Match = Match.model_validate(synthetic_matches(1)["matches"][0])
+    fieldset: Fieldset = Fieldset(None, FieldsetData(id=1, name="Benchmark"))
+    return {
+        "match_us": per_op_us(lambda: generic_to_string(match), number),
+        "fieldset_state_us": per_op_us(lambda: str(fieldset.state), number)
+    }
+
+
+@benchmark
+def bench_models(number: int = 5_000) -> dict[str, float]:
+    raw_match: dict = synthetic_matches(1)["matches"][0]
+    raw_ranking: dict = MockTournament(MockServerArgs()).rank(1)[0]
+    data: list = [raw_match]
+    return {
+        "api_success_us": per_op_us(lambda: APISuccess[Any](data=data, cached=False), number),
+        "match_us": per_op_us(lambda: Match.model_validate(raw_match), number),
+        "ranking_us": per_op_us(lambda: Ranking.model_validate(raw_ranking), number)
+    }
+
+
+@benchmark
+def bench_metrics(number: int = 20_000) -> dict[str, float]:
+    # What instrumentation adds to handling one frame, with the registry disabled and enabled
+    fieldset: Fieldset = Fieldset(None, FieldsetData(id=1, name="Bench"))
+    frame: str = synthetic_fieldset_frames(1)[0]
+
+    async def handle_us() -> float:
+        best: float = math.inf
+        for _ in range(5):
+            started: float = time.perf_counter()
+            for _ in range(number):
+                await fieldset.handle_frame(frame)
+            best = min(best, time.perf_counter() - started)
+        return best / number * 1e6
+
+    was_enabled: bool = Metrics.registry.enabled
+    try:
+        Metrics.disable()
+        disabled: float = asyncio.run(handle_us())
+        Metrics.enable()
+        enabled: float = asyncio.run(handle_us())
+        return {
+            "frame_disabled_us": disabled,
+            "frame_enabled_us": enabled,
+            "observe_us": per_op_us(lambda: Metrics.request_seconds.observe(0.003, "/api/matches/{id}"), number),
+            "prometheus_us": per_op_us(Metrics.registry.to_prometheus, 100)
+        }
+    finally:
+        Metrics.registry.enabled = was_enabled
+        Metrics.registry.reset()
+
+
+# Macro benchmarks against a MockServer
+
+@benchmark
+def bench_rest(requests: int = 2_000, concurrency: int = 8) -> dict[str, float]:
+    async def run() -> dict[str, float]:
+        # Scores a match now and then, so some polls get a 200 among the 304s
+        args: MockServerArgs = MockServerArgs(event_rate=0, score_interval=0.25)
+        async with MockServer(args) as server:
+            client: AsyncClient = AsyncClient(server.client_args(), MemoryTokenStore())
+            paths: list[str] = ["/api/matches/1", "/api/rankings/1/QUAL", "/api/teams/1", "/api/skills"]
+            for path in paths:
+                await client.get(path)
+            before: int = server.stats.requests
+            before_304: int = server.stats.not_modified
+            before_connections: int = server.stats.http_connections
+            remaining: list[int] = [requests]
+
+            async def worker(offset: int) -> None:
+                i: int = offset
+                while remaining[0] > 0:
+                    remaining[0] -= 1
+                    await client.get(paths[i % len(paths)])
+                    i += 1
+
+            started: float = time.perf_counter()
+            await asyncio.gather(*[worker(i) for i in range(concurrency)])
+            elapsed: float = time.perf_counter() - started
+            served: int = server.stats.requests - before
+            # Pooled keep-alive connections are reused, so this stays near 0 unless connections drop
+            connections: int = server.stats.http_connections - before_connections
+            await client.aclose()
+            return {
+                "requests_per_s": served / elapsed,
+                "not_modified_ratio": (server.stats.not_modified - before_304) / served if served else 0.0,
+                "mean_latency_ms": elapsed / served * concurrency * 1e3 if served else 0.0,
+                "new_connections": connections
+            }
+    return asyncio.run(run())
+
+
+@benchmark
+def bench_websocket(duration: float = 2.0, fieldsets: int = 4) -> dict[str, float]:
+    async def run() -> dict[str, float]:
+        # An infinite rate sends as fast as the server's loop allows
+        args: MockServerArgs = MockServerArgs(fieldsets=fieldsets, event_rate=math.inf, score_interval=None)
+        async with MockServer(args) as server:
+            client: AsyncClient = AsyncClient(server.client_args(), MemoryTokenStore())
+            received: list[int] = [0]
+
+            def count(event) -> None:
+                received[0] += 1
+
+            async with FieldsetManager(client) as manager:
+                for fieldset in manager.fieldsets.values():
+                    fieldset.on_event("*", count)
+                sent: int = server.stats.frames_sent
+                await asyncio.sleep(duration)
+                events: int = received[0]
+                sent = server.stats.frames_sent - sent
+            await client.aclose()
+            return {"events_per_s": events / duration, "frames_sent_per_s": sent / duration}
+    return asyncio.run(run())
+
+
+@benchmark
+def bench_commands(count: int = 500) -> dict[str, float]:
+    # Round trips of start_match, from queueing the command to the matchStarted confirming it
+    async def run() -> dict[str, float]:
+        args: MockServerArgs = MockServerArgs(fieldsets=1, event_rate=0, score_interval=None)
+        async with MockServer(args) as server:
+            client: AsyncClient = AsyncClient(server.client_args(), MemoryTokenStore())
+            async with FieldsetManager(client) as manager:
+                fieldset: Fieldset = next(iter(manager.fieldsets.values()))
+                latencies: list[float] = []
+                started: float = time.perf_counter()
+                for _ in range(count):
+                    sent: float = time.perf_counter()
+                    if (await fieldset.start_match(1)).success:
+                        latencies.append(time.perf_counter() - sent)
+                elapsed: float = time.perf_counter() - started
+            await client.aclose()
+            latencies.sort()
+            return {
+                "commands_per_s": count / elapsed,
+                "confirmed": float(len(latencies)),
+                "p50_latency_ms": latencies[len(latencies) // 2] * 1e3 if latencies else 0.0,
+                "max_latency_ms": latencies[-1] * 1e3 if latencies else 0.0
+            }
+    return asyncio.run(run())
+
+
+# Startup, for short-lived scripts that import a Client, make a call or two and exit
+
+# None of these should load with `from Client import Client`, they wait until something needs them
+LAZY_MODULES: tuple[str, ...] = (
+    "websockets", "httpx", "numpy", "sqlite3", "multiprocessing", "Fieldset", "Division", "Journal",
+    "RecordTypes", "FieldsetTypes", "StatsTypes"
+)
+
+
+def import_times(statement: str) -> dict[str, int]:
+    # Cumulative microseconds per module from `python -X importtime` in a fresh interpreter
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    times: dict[str, int] = dict()
+    for line in result.stderr.splitlines():
+        fields: list[str] = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+@benchmark
+def bench_imports(repeat: int = 5) -> dict[str, float]:
+    # Best of repeat runs, the first also counts LAZY_MODULES that were loaded anyway, which should stay 0
+    runs: list[dict[str, int]] = [import_times("from Client import Client") for _ in range(repeat)]
+    async_runs: list[dict[str, int]] = [import_times("from AsyncClient import AsyncClient") for _ in range(repeat)]
+
+    def best(module: str, of: list[dict[str, int]]) -> float:
+        return min(run.get(module, 0) for run in of) / 1e3
+
+    return {
+        "client_ms": best("Client", runs),
+        "types_ms": best("Types", runs),
+        "requests_ms": best("requests", runs),
+        "pydantic_ms": best("pydantic", runs),
+        "async_client_ms": best("AsyncClient", async_runs),
+        "eager_lazy_modules": float(sum(1 for module in LAZY_MODULES if module in runs[0]))
+    }
+
+
+def environment() -> dict[str, Any]:
+    packages: dict[str, str] = dict()
+    for name in ("pydantic", "pydantic-core", "websockets", "httpx", "requests", "numpy", "orjson"):
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            pass
+    return {
+        "taken_at": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "json_backend": Decoder.backend_name,
+        "packages": packages
+    }
+
+
+def compare(baseline: dict[str, Any], results: dict[str, dict[str, float]]) -> None:
+    # new / old per metric, whether higher is better depends on the metric (_us and _ms: lower is better)
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            if (old := baseline.get("results", {}).get(name, {}).get(metric)) is None:
+                continue
+            ratio: float = value / old if old else math.inf
+            print(f"{name}.{metric}: {old:.3f} -> {value:.3f} ({ratio:.2f}x)")
+    return None
+
+
+def main(argv: list[str]) -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmarks of the client's hot paths")
+    parser.add_argument("names", nargs="*", metavar="name", help=f"benchmarks to run, from {', '.join(BENCHMARKS)}")
+    parser.add_argument("--json", metavar="PATH", help="save the environment and results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare against the results of an earlier --json run")
+    options: argparse.Namespace = parser.parse_args(argv)
+    if unknown := [name for name in options.names if name not in BENCHMARKS]:
+        parser.error(f"unknown benchmarks {', '.join(unknown)}")
+
+    results: dict[str, dict[str, float]] = dict()
+    for name in options.names or BENCHMARKS.keys():
+        results[name] = BENCHMARKS[name]()
+        print(name, " ".join(f"{k}={v:.3f}" for k, v in results[name].items()))
+
+    if options.json is not None:
+        with open(options.json, "w") as fout:
+            json.dump(environment() | {"results": results}, fout, indent=2)
+    if options.compare is not None:
+        with open(options.compare) as fin:
+            compare(json.load(fin), results)
+    return None
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])